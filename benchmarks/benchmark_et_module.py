@@ -0,0 +1,303 @@
+"""Benchmarks of the et_module hot paths with synthetic national-scale inputs
+
+Every benchmark is run for 10, 1k and 10k regions and 1 and 36 simulation
+years (combinations with a dense output larger than `MAX_DENSE_VALUES` are
+skipped). Wall time (median of `--repeat` runs) and peak memory allocated
+during a run (tracemalloc) are reported and compared with the stored
+baseline results.
+
+Run all benchmarks and compare with the baseline:
+
+    python benchmarks/benchmark_et_module.py
+
+Store the results as new baseline:
+
+    python benchmarks/benchmark_et_module.py --save-baseline
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import numpy as np
+
+from et_module import charging_functions
+from et_module import diffusion_functions
+from et_module import main_functions
+from et_module.main import main, v2g_g2v_capacity, fleet_capacity_yh
+
+PATH_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+NR_OF_REGIONS = [10, 1000, 10000]
+NR_OF_YEARS = [1, 36]
+
+# Maximum number of values of dense hourly outputs (10k regions * 8760 hours)
+MAX_DENSE_VALUES = 10000 * 8760
+
+BASE_YR = 2015
+YR_UNTIL_CHANGED = 2050
+
+BENCHMARKS = []
+
+def benchmark(dense_output=False, sized=True):
+    """Register a benchmark function which is called with the inputs
+    of `get_inputs` (only with the smallest inputs if not `sized`)
+    """
+    def register(function):
+        BENCHMARKS.append((function.__name__, function, dense_output, sized))
+        return function
+    return register
+
+def get_inputs(nr_of_regions, nr_of_years, path_tmp):
+    """Generate synthetic inputs
+    """
+    rng = np.random.RandomState(0)
+
+    shape_yd = np.full((365), 1/365)
+    load_profiles = [
+        main_functions.LoadProfile(
+            name='av_lp_2015.csv',
+            year=2015,
+            shape_yd=shape_yd,
+            shape_dh=np.full((24), 1/24)),
+        main_functions.LoadProfile(
+            name='av_lp_2050.csv',
+            year=2050,
+            shape_yd=shape_yd,
+            shape_dh=np.arange(24) / np.sum(np.arange(24)))]
+
+    return {
+        'regions': ['reg_{}'.format(nr) for nr in range(nr_of_regions)],
+        'curr_yrs': np.linspace(BASE_YR, YR_UNTIL_CHANGED, nr_of_years).round(),
+        'et_service_demand_yh': rng.rand(nr_of_regions, 8760),
+        'load_profiles': load_profiles,
+        'reg_trips_ev_24h': rng.randint(0, 100, size=(nr_of_years, nr_of_regions, 24)),
+        'reg_elec_24h': rng.rand(nr_of_years, nr_of_regions, 24),
+        'sig_steeppness': np.linspace(0.5, 2, nr_of_regions),
+        'path_tmp': path_tmp}
+
+@benchmark()
+def diffusion_sweep(inputs):
+    """Sigmoid and linear diffusion of all years for one parameter per region
+    """
+    curr_yrs = inputs['curr_yrs'][:, np.newaxis]
+
+    diffusion_functions.linear_diff_array(
+        BASE_YR, curr_yrs, 0, 1, YR_UNTIL_CHANGED + inputs['sig_steeppness'].round())
+    diffusion_functions.sigmoid_diffusion_array(
+        BASE_YR, curr_yrs, YR_UNTIL_CHANGED, 0, inputs['sig_steeppness'])
+
+@benchmark(sized=False)
+def get_load_profiles(inputs):
+    """Read load profiles from csv files (with cache)
+    """
+    for name in ['av_lp_2015.csv', 'av_lp_2050.csv']:
+        path_to_csv = os.path.join(inputs['path_tmp'], name)
+        if not os.path.isfile(path_to_csv):
+            with open(path_to_csv, 'w') as csvfile:
+                csvfile.write(",".join(str(hour) for hour in range(24)) + "\n")
+                csvfile.write(",".join("{:.6f}".format(100 / 24) for _ in range(24)) + "\n")
+
+    main_functions.get_load_profiles(inputs['path_tmp'])
+
+@benchmark(dense_output=True)
+def load_curve_assignement(inputs):
+    """Dense hourly demand, one call per year
+    """
+    for curr_yr in inputs['curr_yrs']:
+        main_functions.load_curve_assignement(
+            curr_yr=curr_yr,
+            base_yr=BASE_YR,
+            yr_until_changed=YR_UNTIL_CHANGED,
+            et_service_demand_yh=inputs['et_service_demand_yh'],
+            load_profiles=inputs['load_profiles'],
+            regions=inputs['regions'],
+            charging_scenario='sheduled')
+
+@benchmark(dense_output=True)
+def load_curve_assignement_years(inputs):
+    """Dense hourly demand of all years in one call
+    """
+    main_functions.load_curve_assignement_years(
+        curr_yrs=inputs['curr_yrs'],
+        base_yr=BASE_YR,
+        yr_until_changed=YR_UNTIL_CHANGED,
+        et_service_demand_yh=inputs['et_service_demand_yh'],
+        load_profiles=inputs['load_profiles'],
+        regions=inputs['regions'],
+        charging_scenario='sheduled')
+
+@benchmark()
+def load_curve_assignement_factorized(inputs):
+    """Factorized hourly demand of all years and hourly total over regions
+    """
+    main_functions.load_curve_assignement_years(
+        curr_yrs=inputs['curr_yrs'],
+        base_yr=BASE_YR,
+        yr_until_changed=YR_UNTIL_CHANGED,
+        et_service_demand_yh=inputs['et_service_demand_yh'],
+        load_profiles=inputs['load_profiles'],
+        regions=inputs['regions'],
+        charging_scenario='sheduled',
+        output='factorized').get_total_yh()
+
+@benchmark()
+def main_capacity(inputs):
+    """Battery capacity of all years in one call
+    """
+    main(
+        inputs['regions'],
+        BASE_YR,
+        inputs['reg_trips_ev_24h'],
+        inputs['reg_elec_24h'])
+
+@benchmark()
+def v2g_capacity(inputs):
+    """V2G and G2V capacity of all years in one call
+    """
+    v2g_g2v_capacity(
+        inputs['reg_trips_ev_24h'],
+        inputs['reg_elec_24h'])
+
+@benchmark(dense_output=True)
+def fleet_capacity(inputs):
+    """Hourly V2G and G2V capacity of the fleet for one year
+    """
+    fleet_capacity_yh(
+        inputs['reg_trips_ev_24h'][0],
+        inputs['et_service_demand_yh'])
+
+@benchmark(dense_output=True)
+def smart_charging(inputs):
+    """Valley filling of the daily charging energy of one year
+    """
+    charging_functions.SmartChargingScheduler(
+        base_load_yh=inputs['et_service_demand_yh'],
+        max_charging_power=0.5).schedule(inputs['et_service_demand_yh'])
+
+def run_benchmark(function, inputs, repeat):
+    """Measure median wall time of `repeat` runs and peak allocated memory
+
+    The median is less affected than the best time by single fast or
+    slow runs, which otherwise show up as regressions on a busy machine.
+    """
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(inputs)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        function(inputs)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'time': float(np.median(times)), 'peak_memory': peak_memory}
+
+def run_benchmarks(repeat=5, names=None):
+    """Run all benchmarks for all numbers of regions and years
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as path_tmp:
+        for nr_of_regions in NR_OF_REGIONS:
+            for nr_of_years in NR_OF_YEARS:
+                results.update(run_benchmarks_size(
+                    nr_of_regions, nr_of_years, path_tmp, repeat, names))
+
+    return results
+
+def run_benchmarks_size(nr_of_regions, nr_of_years, path_tmp, repeat, names):
+    """Run all benchmarks for a number of regions and years
+    """
+    results = {}
+    inputs = get_inputs(nr_of_regions, nr_of_years, path_tmp)
+
+    for name, function, dense_output, sized in BENCHMARKS:
+        if names and name not in names:
+            continue
+        if not sized and (nr_of_regions, nr_of_years) != (NR_OF_REGIONS[0], NR_OF_YEARS[0]):
+            continue
+        if dense_output and nr_of_regions * nr_of_years * 8760 > MAX_DENSE_VALUES:
+            continue
+
+        key = "{}[regions={},years={}]".format(name, nr_of_regions, nr_of_years)
+        results[key] = run_benchmark(function, inputs, repeat)
+
+        print("{:<65} {:>10.4f} s {:>10.1f} MB".format(
+            key, results[key]['time'], results[key]['peak_memory'] / 1e6))
+
+    return results
+
+def compare(results, baseline, time_tolerance, memory_tolerance, min_time=0.05, min_memory=1e6):
+    """Get all benchmarks which are slower or use more memory than
+    the baseline times the tolerance (times shorter than `min_time`
+    and peak memory below `min_memory` bytes are too noisy to be
+    compared)
+    """
+    regressions = []
+    for key, result in sorted(results.items()):
+        if key not in baseline:
+            continue
+
+        time_ratio = max(result['time'], min_time) / max(baseline[key]['time'], min_time)
+        memory_ratio = max(result['peak_memory'], min_memory) / max(baseline[key]['peak_memory'], min_memory)
+
+        if time_ratio > time_tolerance or memory_ratio > memory_tolerance:
+            regressions.append((key, time_ratio, memory_ratio))
+
+    return regressions
+
+def run(args=None):
+    """Run benchmarks from the command line
+    """
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--benchmark', action='append', help="Only run this benchmark")
+    parser.add_argument('--baseline', default=PATH_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true')
+    parser.add_argument('--time-tolerance', type=float, default=1.5)
+    parser.add_argument('--memory-tolerance', type=float, default=1.2)
+    parser.add_argument(
+        '--min-time', type=float, default=0.05,
+        help="Shorter times [s] are compared as this time (run-to-run noise of fast benchmarks)")
+    parser.add_argument(
+        '--min-memory', type=float, default=1e6,
+        help="Smaller peak memory [bytes] is compared as this memory")
+    args = parser.parse_args(args)
+
+    results = run_benchmarks(repeat=args.repeat, names=args.benchmark)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as baseline_file:
+            json.dump({
+                'machine': {
+                    'platform': platform.platform(),
+                    'python': platform.python_version(),
+                    'numpy': np.__version__},
+                'results': results}, baseline_file, indent=2, sort_keys=True)
+        return 0
+
+    if not os.path.isfile(args.baseline):
+        print("No baseline results stored in {}".format(args.baseline))
+        return 0
+
+    with open(args.baseline, 'r') as baseline_file:
+        baseline = json.load(baseline_file)['results']
+
+    regressions = compare(
+        results, baseline, args.time_tolerance, args.memory_tolerance,
+        min_time=args.min_time, min_memory=args.min_memory)
+
+    for key, time_ratio, memory_ratio in regressions:
+        print("Regression {}: time x{:.2f}, peak memory x{:.2f}".format(
+            key, time_ratio, memory_ratio))
+
+    return 1 if regressions else 0
+
+if __name__ == '__main__':
+    sys.exit(run())
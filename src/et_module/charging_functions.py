@@ -0,0 +1,252 @@
+"""Smart charging of EVs: shift the daily charging energy into the
+hours with the lowest electricity demand (valley filling)
+"""
+import logging
+import numpy as np
+
+class SmartChargingScheduler(object):
+    """Schedules the EV charging energy of every region and day into the
+    hours with the lowest demand under charging power and departure
+    time constraints
+
+    The year is split into daily charging windows of 24 hours starting
+    at `window_start_hour`. The charging energy of a window has to be
+    charged within the window (i.e. before departure), in hours in which
+    vehicles are plugged in and with at most the maximum charging power.
+    Within these constraints, the energy is charged in the hours with
+    the lowest base load (see `valley_filling`).
+
+    Arguments
+    ----------
+    base_load_yh : numpy.ndarray, optional
+        Electricity demand without EV charging of every hour (hours) or
+        of every region and hour (regions, hours). By default, the
+        energy is distributed equally over the available hours
+    max_charging_power : float or numpy.ndarray, optional
+        [kW] Maximum charging power of every hour (e.g. number of
+        chargers times charger power), same for all regions, of every
+        region (regions) or of every region and hour (regions, hours).
+        By default the power is not limited
+    charging_availability_24h : numpy.ndarray, optional
+        Whether vehicles are plugged in in every hour of the day (24) or
+        of every region and hour of the day (regions, 24). By default,
+        vehicles can be charged in every hour
+    window_start_hour : int
+        First hour of every charging window (e.g. 18 if vehicles arrive
+        in the evening and depart in the morning). The last window wraps
+        around to the first hours of the year
+    chunk_size : int
+        Maximum number of regions which are scheduled at once (limits
+        the memory of temporary arrays)
+    """
+    def __init__(
+            self,
+            base_load_yh=None,
+            max_charging_power=None,
+            charging_availability_24h=None,
+            window_start_hour=0,
+            chunk_size=256
+        ):
+        """Constructor
+        """
+        self.base_load_yh = base_load_yh
+        self.max_charging_power = max_charging_power
+        self.charging_availability_24h = charging_availability_24h
+        self.window_start_hour = window_start_hour
+        self.chunk_size = chunk_size
+
+        # Energy of every region and charging window which could not be
+        # charged (regions, windows). A call with `region_nrs` only updates
+        # the rows of these regions (rows without a call are NaN)
+        self.unmet_energy = None
+
+    def get_state(self):
+        """Get the arguments the scheduled demand depends on by name
+        (e.g. as shared inputs of `main_functions.RegionFingerprints`)
+
+        Returns
+        -------
+        state : dict
+            Arguments which are set (arrays or numbers)
+        """
+        state = {'window_start_hour': self.window_start_hour}
+
+        for name in ['base_load_yh', 'max_charging_power', 'charging_availability_24h']:
+            value = getattr(self, name)
+            if value is not None:
+                state[name] = value
+
+        return state
+
+    def schedule(self, et_demand_yh, region_nrs=None, out=None):
+        """Shift the charging energy of every region and charging window
+        into the hours with the lowest demand
+
+        Arguments
+        ----------
+        et_demand_yh : numpy.ndarray
+            Hourly charging demand (regions, hours), e.g. from
+            `main_functions.load_curve_assignement`. Only the energy of
+            every charging window is used
+        region_nrs : numpy.ndarray, optional
+            Position of the regions of `et_demand_yh` in the regional
+            arguments of the scheduler and rows of `unmet_energy` which
+            are updated (by default all regions)
+        out : numpy.ndarray, optional
+            Array the scheduled demand is written into (can be
+            `et_demand_yh`)
+
+        Returns
+        -------
+        et_demand_yh_scheduled : numpy.ndarray
+            Scheduled hourly charging demand (regions, hours)
+        """
+        nr_of_regions, nr_of_hours = et_demand_yh.shape
+        assert nr_of_hours % 24 == 0
+
+        if out is None:
+            out = np.empty_like(et_demand_yh)
+
+        window_shape = (nr_of_hours // 24, 24)
+
+        if region_nrs is None:
+            region_nrs = np.arange(nr_of_regions)
+            self.unmet_energy = np.zeros((nr_of_regions, ) + window_shape[:1])
+        elif (self.unmet_energy is None or
+                self.unmet_energy.shape[1] != window_shape[0] or
+                self.unmet_energy.shape[0] <= np.max(region_nrs, initial=-1)):
+            self.unmet_energy = np.full(
+                (np.max(region_nrs, initial=-1) + 1, ) + window_shape[:1], np.nan)
+
+        total_energy = 0
+        total_unmet_energy = 0
+
+        for region_nr_start in range(0, nr_of_regions, self.chunk_size):
+            chunk = slice(region_nr_start, region_nr_start + self.chunk_size)
+            chunk_region_nrs = region_nrs[chunk]
+
+            # Hours of every charging window (regions, windows, 24)
+            demand = self._get_windows(et_demand_yh[chunk], window_shape)
+            energy = np.sum(demand, axis=-1, dtype=np.float64)
+            total_energy += np.sum(energy)
+
+            if self.base_load_yh is None:
+                base_load = np.zeros(demand.shape)
+            else:
+                base_load = self._get_windows(
+                    _select_regions(self.base_load_yh, chunk_region_nrs), window_shape)
+
+            # Every hour can at most take the energy of the whole window
+            max_power = np.broadcast_to(energy[..., np.newaxis], demand.shape)
+
+            if self.max_charging_power is not None:
+                max_charging_power = np.asarray(self.max_charging_power, dtype=np.float64)
+                if max_charging_power.ndim == 2:
+                    max_charging_power = self._get_windows(
+                        max_charging_power[chunk_region_nrs], window_shape)
+                elif max_charging_power.ndim == 1:
+                    max_charging_power = max_charging_power[chunk_region_nrs, np.newaxis, np.newaxis]
+                max_power = np.minimum(max_power, max_charging_power)
+
+            if self.charging_availability_24h is not None:
+                availability_24h = _select_regions(
+                    np.asarray(self.charging_availability_24h, dtype=bool), chunk_region_nrs)
+                availability = self._get_windows(
+                    np.broadcast_to(
+                        availability_24h[..., np.newaxis, :],
+                        availability_24h.shape[:-1] + window_shape).reshape(
+                            availability_24h.shape[:-1] + (nr_of_hours, )),
+                    window_shape)
+                max_power = max_power * availability
+
+            charging = valley_filling(base_load, energy, max_power)
+
+            unmet_energy = energy - np.sum(charging, axis=-1)
+            self.unmet_energy[chunk_region_nrs] = unmet_energy
+            total_unmet_energy += np.sum(unmet_energy)
+
+            out[chunk] = np.roll(
+                charging.reshape(demand.shape[0], nr_of_hours), self.window_start_hour, axis=-1)
+
+        # Energy which exceeds the charging power of the available hours is dropped
+        if total_unmet_energy > 1e-9 * total_energy:
+            logging.warning(
+                "Smart charging: %s of %s charging energy cannot be charged within the constraints",
+                total_unmet_energy, total_energy)
+
+        return out
+
+    def _get_windows(self, values_yh, window_shape):
+        """Split hourly values into charging windows (..., windows, 24)
+        """
+        values_yh = np.roll(values_yh, -self.window_start_hour, axis=-1)
+
+        return values_yh.reshape(values_yh.shape[:-1] + window_shape)
+
+def _select_regions(values, region_nrs):
+    """Select the regions of an array of every region (2 axes) or
+    get the array of all regions (1 axis)
+    """
+    values = np.asarray(values)
+    if values.ndim == 2:
+        return values[region_nrs]
+    return values
+
+def valley_filling(base_load, energy, max_power):
+    """Distribute energy over hours so that the hours with the lowest
+    base load are filled up to a common level (water-filling)
+
+    The charging of every hour is `clip(level - base_load, 0, max_power)`
+    with the level at which the charged energy equals `energy`. The
+    charged energy is a piecewise linear function of the level with
+    breakpoints at `base_load` (hour starts charging) and `base_load +
+    max_power` (hour reaches maximum power). The breakpoints of all
+    periods are sorted at once, the charged energy at the breakpoints is
+    a cumulative sum and the level is interpolated in the segment in
+    which the energy is reached.
+
+    Arguments
+    ---------
+    base_load : numpy.ndarray
+        Load of every hour of every period (..., hours)
+    energy : numpy.ndarray
+        Energy to distribute in every period (...)
+    max_power : numpy.ndarray
+        Maximum (finite) energy of every hour of every period (..., hours),
+        0 for hours without charging
+
+    Returns
+    -------
+    charging : numpy.ndarray
+        Energy of every hour of every period (..., hours). If the energy
+        exceeds the sum of `max_power`, all hours are at maximum power
+    """
+    base_load, max_power = np.broadcast_arrays(
+        np.asarray(base_load, dtype=np.float64), np.asarray(max_power, dtype=np.float64))
+    energy = np.asarray(energy, dtype=np.float64)[..., np.newaxis]
+    nr_of_hours = base_load.shape[-1]
+
+    # Breakpoints of the charged energy and change of slope at the breakpoints
+    breakpoints = np.concatenate((base_load, base_load + max_power), axis=-1)
+    slope_changes = np.repeat(np.array([1, -1], dtype=np.int64), nr_of_hours)
+
+    order = np.argsort(breakpoints, axis=-1, kind='stable')
+    breakpoints = np.take_along_axis(breakpoints, order, axis=-1)
+    slopes = np.cumsum(slope_changes[order], axis=-1)
+
+    # Charged energy at every breakpoint
+    charged = np.zeros(breakpoints.shape)
+    np.cumsum(slopes[..., :-1] * np.diff(breakpoints, axis=-1), axis=-1, out=charged[..., 1:])
+
+    # Last breakpoint below the energy
+    segment_nrs = np.sum(charged < energy, axis=-1, keepdims=True) - 1
+    np.clip(segment_nrs, 0, None, out=segment_nrs)
+
+    segment_slopes = np.take_along_axis(slopes, segment_nrs, axis=-1)
+    level = np.take_along_axis(breakpoints, segment_nrs, axis=-1) + np.divide(
+        energy - np.take_along_axis(charged, segment_nrs, axis=-1),
+        segment_slopes,
+        out=np.full(energy.shape, np.inf),
+        where=segment_slopes > 0)
+
+    return np.clip(level - base_load, 0, max_power)
@@ -1,6 +1,7 @@
 """Diffusion functions
 """
 import math
+import numpy as np
 
 def linear_diff(base_yr, curr_yr, value_start, value_end, yr_until_changed):
     """Calculate a linear diffusion for a current year. If
@@ -86,3 +87,90 @@ def sigmoid_diffusion(base_yr, curr_yr, end_yr, sig_midpoint, sig_steeppness):
         cy_p = 1.0 / (1 + math.exp(-1 * sig_steeppness * (y_trans - sig_midpoint)))
 
         return cy_p
+
+def linear_diff_array(base_yr, curr_yr, value_start, value_end, yr_until_changed):
+    """Vectorized version of `linear_diff`. All arguments can be
+    scalars or arrays which are broadcast against each other.
+
+    Arguments
+    ----------
+    base_yr : int or array
+        Base year of simulation period
+    curr_yr : int or array
+        The year of the current simulation
+    value_start : float or array
+        Fraction of population served with fuel_enduse_switch in base year
+    value_end : float or array
+        Fraction of population served with fuel_enduse_switch in end year
+    yr_until_changed : int or array
+        Year until changed is fully implemented
+
+    Returns
+    -------
+    fract_cy : float or array
+        The fraction in the simulation years
+
+    Note
+    ----
+    Same edge cases as `linear_diff`. If `yr_until_changed` is identical
+    to the base year (where `linear_diff` divides by zero), the end
+    value is returned for all years other than the base year.
+    """
+    base_yr, curr_yr, value_start, value_end, yr_until_changed = np.broadcast_arrays(
+        *[np.asarray(arg, dtype=float) for arg in (
+            base_yr, curr_yr, value_start, value_end, yr_until_changed)])
+
+    # Total number of simulated years
+    sim_years = yr_until_changed - base_yr + 1
+
+    no_change = (curr_yr == base_yr) | (sim_years == 0) | (value_end == value_start)
+
+    #-1 because in base year no change
+    with np.errstate(divide='ignore', invalid='ignore'):
+        fract_cy = ((value_end - value_start) / (sim_years - 1)) * (curr_yr - base_yr) + value_start
+
+    fract_cy = np.where(sim_years == 1, value_end, fract_cy)
+    fract_cy = np.where(no_change, value_start, fract_cy)
+
+    return fract_cy[()]
+
+def sigmoid_diffusion_array(base_yr, curr_yr, end_yr, sig_midpoint, sig_steeppness):
+    """Vectorized version of `sigmoid_diffusion`. All arguments can be
+    scalars or arrays which are broadcast against each other (e.g. a
+    range of years or a sweep over sigmoid parameters).
+
+    Arguments
+    ----------
+    base_yr : int or array
+        Base year of simulation period
+    curr_yr : int or array
+        The year of the current simulation
+    end_yr : int or array
+        The year a fuel_enduse_switch saturaes
+    sig_midpoint : float or array
+        Mid point of sigmoid diffusion function
+    sig_steeppness : float or array
+        Steepness of sigmoid diffusion function
+
+    Returns
+    -------
+    cy_p : float or array
+        The fraction of the diffusion in the simulation years
+    """
+    base_yr, curr_yr, end_yr, sig_midpoint, sig_steeppness = np.broadcast_arrays(
+        *[np.asarray(arg, dtype=float) for arg in (
+            base_yr, curr_yr, end_yr, sig_midpoint, sig_steeppness)])
+
+    # Translates simulation year on the sigmoid graph reaching from -6 to +6 (x-value)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        y_trans = -5.0 + (10.0 / (end_yr - base_yr)) * (curr_yr - base_yr)
+    y_trans = np.where(end_yr == base_yr, 5.0, y_trans)
+
+    # Get a value between 0 and 1 (sigmoid curve ranging from 0 to 1)
+    with np.errstate(over='ignore'):
+        cy_p = 1.0 / (1 + np.exp(-1 * sig_steeppness * (y_trans - sig_midpoint)))
+
+    cy_p = np.where(curr_yr == end_yr, 1.0, cy_p)
+    cy_p = np.where(curr_yr == base_yr, 0.0, cy_p)
+
+    return cy_p[()]
@@ -0,0 +1,174 @@
+"""Opt-in timing and memory instrumentation of the calculation stages
+
+Stages are recorded only while a `Recorder` is active, e.g.:
+
+    with instrumentation.record(trace_memory=True) as recorder:
+        main_functions.load_curve_assignement(...)
+
+    print(recorder.report())
+
+If no recorder is active, `stage` returns a shared no-op object, so the
+instrumented functions only pay for one function call per stage.
+"""
+import time
+import collections
+import contextlib
+import tracemalloc
+import pandas as pd
+
+# Record of a calculation stage
+StageRecord = collections.namedtuple(
+    'StageRecord', ['stage', 'time', 'allocated_bytes', 'array_bytes', 'array_shapes'])
+
+# Active recorder (None if instrumentation is disabled)
+_recorder = None
+
+# Whether tracemalloc was started by `enable`
+_started_tracemalloc = False
+
+class Recorder(object):
+    """Collects the records of all stages
+
+    Arguments
+    ----------
+    trace_memory : bool
+        Whether the memory allocated in every stage is recorded with
+        `tracemalloc` (slows down allocations)
+    """
+    def __init__(self, trace_memory=False):
+        """Constructor
+        """
+        self.trace_memory = trace_memory
+        self.records = []
+
+    def clear(self):
+        """Remove all records
+        """
+        self.records = []
+
+    def summary(self):
+        """Summary of all records per stage
+
+        Returns
+        -------
+        summary : pandas.DataFrame
+            Number of calls, total and mean time [s], maximum allocated
+            bytes and total bytes of result arrays of every stage
+        """
+        records = pd.DataFrame(self.records, columns=StageRecord._fields)
+
+        return records.groupby('stage', sort=False).agg(
+            calls=('time', 'size'),
+            time=('time', 'sum'),
+            time_mean=('time', 'mean'),
+            allocated_bytes=('allocated_bytes', 'max'),
+            array_bytes=('array_bytes', 'sum'))
+
+    def report(self):
+        """Summary of all records per stage as text
+        """
+        return self.summary().to_string()
+
+class _Stage(object):
+    """Context manager which records one stage
+    """
+    __slots__ = ('recorder', 'name', 'start', 'memory_start', 'array_bytes', 'array_shapes')
+
+    def __init__(self, recorder, name):
+        self.recorder = recorder
+        self.name = name
+        self.array_bytes = 0
+        self.array_shapes = []
+
+    def __enter__(self):
+        if self.recorder.trace_memory:
+            tracemalloc.reset_peak()
+            self.memory_start = tracemalloc.get_traced_memory()[0]
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        elapsed = time.perf_counter() - self.start
+
+        if self.recorder.trace_memory:
+            allocated_bytes = tracemalloc.get_traced_memory()[1] - self.memory_start
+        else:
+            allocated_bytes = None
+
+        self.recorder.records.append(StageRecord(
+            self.name, elapsed, allocated_bytes, self.array_bytes, self.array_shapes))
+
+    def add_array(self, array):
+        """Record size of an array created in the stage
+        """
+        self.array_bytes += array.nbytes
+        self.array_shapes.append(array.shape)
+
+class _NoStage(object):
+    """Context manager which does nothing if no recorder is active
+    """
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        pass
+
+    def add_array(self, array):
+        pass
+
+_NO_STAGE = _NoStage()
+
+def stage(name):
+    """Get a context manager which records the stage `name` if a
+    recorder is active
+    """
+    if _recorder is None:
+        return _NO_STAGE
+
+    return _Stage(_recorder, name)
+
+def enable(trace_memory=False):
+    """Activate a new recorder
+
+    Returns
+    -------
+    recorder : Recorder
+        Active recorder
+    """
+    global _recorder, _started_tracemalloc
+
+    if trace_memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+        _started_tracemalloc = True
+
+    _recorder = Recorder(trace_memory=trace_memory)
+
+    return _recorder
+
+def disable():
+    """Deactivate the recorder
+    """
+    global _recorder, _started_tracemalloc
+
+    if _started_tracemalloc:
+        tracemalloc.stop()
+        _started_tracemalloc = False
+
+    _recorder = None
+
+@contextlib.contextmanager
+def record(trace_memory=False):
+    """Context manager which activates a recorder while it is entered
+
+    Yields
+    ------
+    recorder : Recorder
+        Active recorder
+    """
+    recorder = enable(trace_memory=trace_memory)
+    try:
+        yield recorder
+    finally:
+        disable()
@@ -1,8 +1,23 @@
 """The sector model wrapper for smif to run the energy demand model
 """
+import sys
 import numpy as np
 
-def main(regions, timestep, reg_trips_ev_24h, reg_elec_24h):
+from et_module import instrumentation
+from et_module import main_functions
+
+def main(
+        regions,
+        timestep,
+        reg_trips_ev_24h,
+        reg_elec_24h,
+        out=None,
+        dtype=float,
+        fingerprints=None,
+        nr_of_peak_hours=1,
+        assumption_av_usable_battery_capacity=30.0,
+        assumption_nr_ev_per_trip=1
+    ):
     """Runs the electric vehicle model for one `timestep`
 
     Calculation steps:
@@ -11,122 +26,411 @@ def main(regions, timestep, reg_trips_ev_24h, reg_elec_24h):
 
     Arguments
     ---------
-    regions : list
+    regions : list or RegionIndex
         A list of region names
     timestep : int
         The current model year
     reg_trips_ev_24h : numpy.ndarray
         Array of shape regions-by-intervals containing the number of trips
-        started in each region in each interval
+        started in each region in each interval. Can have leading batch
+        axes, e.g. (scenarios, timesteps, regions, intervals)
     reg_elec_24h : numpy.ndarray
         Array of shape regions-by-intervals containing hourly demand data
-        for every region in (kWh)
+        for every region in (kWh). Same leading batch axes as
+        `reg_trips_ev_24h`
+    out : numpy.ndarray, optional
+        Array of shape (regions) (or batch axes plus regions) the total
+        battery capacity is written into. Can be used to reuse memory
+        over repeated calls
+    dtype : dtype
+        Data type of the total battery capacity if no `out` is given
+    fingerprints : RegionFingerprints, optional
+        Fingerprints of the trips and demand of every region of the
+        previous call. If given, only regions whose trips or demand
+        changed are recalculated (all regions if `nr_of_peak_hours` or
+        an assumption changed). The assumptions need to be scalars.
+        Without `out`, the array of the previous call is updated and
+        returned
+    nr_of_peak_hours : int
+        Number of hours with the highest electricity demand. The number
+        of EVs is the highest number of trips in these hours, so hours
+        with (nearly) the same demand as the peak hour are considered
+    assumption_av_usable_battery_capacity : float or numpy.ndarray
+        [kwh] Average (storage) capacity of EV Source: https://en.wikipedia.org/wiki/Electric_vehicle_battery
+    assumption_nr_ev_per_trip : float or numpy.ndarray
+        [-] Number of EVs per trip
 
     Returns
     -------
-    et_module_out : dict
-        Outputs of et_module
+    et_module_out : numpy.ndarray
+        Total battery capacity of every region, shape (regions) or with
+        the same leading batch axes as the inputs (e.g.
+        (scenarios, timesteps, regions))
+
+    Note
+    ----
+    The assumptions can be given as arrays which broadcast against the
+    regions, e.g. samples of shape (samples, 1) give a capacity of shape
+    (samples, regions) (not with `fingerprints`).
     """
-    nr_of_regions = len(regions)
+    assert reg_elec_24h.shape[-2] == len(regions)
+    assert reg_trips_ev_24h.shape == reg_elec_24h.shape
 
-    # --------------------------------------
-    # Assumptions
-    # --------------------------------------
-    assumption_nr_ev_per_trip = 1                   # [-] Number of EVs per trip
-    #assumption_ev_p_with_v2g_capability = 0.5       # [%] Percentage of EVs used for V2G and G2V
-    #assumption_av_charging_state = 0.5              # [%] Assumed average state-of-charge of EVs before peak trip hour
-    assumption_av_usable_battery_capacity = 30.0    # [kwh] Average (storage) capacity of EV Source: https://en.wikipedia.org/wiki/Electric_vehicle_battery
-    #assumption_safety_margin = 0.1                  # [%] Assumed safety margin (minimum capacity SOC)
+    if fingerprints is None:
+        dirty = None
+    else:
+        # Only regions whose trips or demand changed are recalculated
+        # (all regions if the number of peak hours or an assumption changed)
+        shared = {
+            'nr_of_peak_hours': nr_of_peak_hours,
+            'assumption_av_usable_battery_capacity': assumption_av_usable_battery_capacity,
+            'assumption_nr_ev_per_trip': assumption_nr_ev_per_trip}
 
-    # --------------------------------------
-    # 1. Find peak demand hour for EVs
-    # --------------------------------------
-    # Hour of electricity peak demand in day per region
-    reg_peak_position_h_elec = np.argmax(reg_elec_24h, axis=1)
+        for name, value in shared.items():
+            if np.ndim(value) != 0:
+                sys.exit("Error: {} has to be a scalar if fingerprints are used".format(name))
 
-    # Maximum electricity demand of all trips of all vehicles per region
-    reg_peak_demand_h_elec = np.max(reg_elec_24h, axis=1)
+        if out is None:
+            out = fingerprints.get_out(reg_elec_24h.shape[:-1], dtype)
 
-    # --------------------------------------
-    # 2. Calculate number of EVs in peak hour with help of trip number
-    # --------------------------------------
-    reg_max_nr_ev = np.zeros((nr_of_regions))
-    for region_nr, peak_hour_nr in enumerate(reg_peak_position_h_elec):
-        reg_max_nr_ev[region_nr] = reg_trips_ev_24h[region_nr][peak_hour_nr] * assumption_nr_ev_per_trip
+        dirty = fingerprints.update(
+            main_functions.get_fingerprints(
+                (reg_trips_ev_24h, reg_elec_24h), reg_elec_24h.shape[:-1]),
+            out,
+            shared=shared)
+
+        reg_trips_ev_24h = reg_trips_ev_24h[dirty]
+        reg_elec_24h = reg_elec_24h[dirty]
+
+    with instrumentation.stage('peak_hour'):
+        # --------------------------------------
+        # 1. Find peak demand hour for EVs
+        # --------------------------------------
+        # Hour(s) of electricity peak demand in day per region
+        if nr_of_peak_hours == 1:
+            reg_peak_position_h_elec = np.argmax(reg_elec_24h, axis=-1)[..., np.newaxis]
+        else:
+            reg_peak_position_h_elec, _ = main_functions.get_peak_hours(
+                reg_elec_24h, nr_of_peak_hours)
+
+        # --------------------------------------
+        # 2. Calculate number of EVs in peak hour(s) with help of trip number
+        # --------------------------------------
+        reg_max_nr_ev = np.max(np.take_along_axis(
+            reg_trips_ev_24h, reg_peak_position_h_elec, axis=-1), axis=-1) * assumption_nr_ev_per_trip
+
+    with instrumentation.stage('capacity') as stage:
+        # --------------------------------------
+        # 3. Calculate total vehicle battery capacity
+        # --------------------------------------
+        if out is None:
+            out = np.empty(np.broadcast_shapes(
+                reg_max_nr_ev.shape, np.shape(assumption_av_usable_battery_capacity)), dtype=dtype)
+
+        if dirty is None:
+            total_battery_capacity = np.multiply(
+                reg_max_nr_ev, assumption_av_usable_battery_capacity, out=out)
+        else:
+            out[dirty] = reg_max_nr_ev * assumption_av_usable_battery_capacity
+            total_battery_capacity = out
+
+        stage.add_array(total_battery_capacity)
+
+    return total_battery_capacity
 
+def v2g_g2v_capacity(
+        reg_trips_ev_24h,
+        reg_elec_24h,
+        assumption_ev_p_with_v2g_capability=0.5,
+        assumption_av_charging_state=0.5,
+        assumption_safety_margin=0.1,
+        assumption_av_usable_battery_capacity=30.0,
+        assumption_nr_ev_per_trip=1,
+        dtype=float
+    ):
+    """Calculates the flexible EV battery capacity which can be used
+    for vehicle-to-grid (V2G) and grid-to-vehicle (G2V) in the peak
+    hour of every region
+
+    Calculation steps:
+    - Calculates number of EVs (and EVs with V2G capability) in peak hour
+    - Calculates maximum capacity and safety margin capacity of all EVs with V2G capability
+    - Calculates V2G capacity: maximum capacity minus the larger of the used
+      capacity (peak demand plus safety margin) and the capacity at the
+      average state-of-charge
+    - Calculates G2V capacity: maximum capacity minus the capacity at the
+      average state-of-charge
+
+    Arguments
+    ---------
+    reg_trips_ev_24h : numpy.ndarray
+        Array of shape regions-by-intervals containing the number of trips
+        started in each region in each interval (leading batch axes allowed)
+    reg_elec_24h : numpy.ndarray
+        Array of shape regions-by-intervals containing hourly demand data
+        for every region in (kWh) (leading batch axes allowed)
+    assumption_ev_p_with_v2g_capability : float or numpy.ndarray
+        [%] Percentage of EVs used for V2G and G2V
+    assumption_av_charging_state : float or numpy.ndarray
+        [%] Assumed average state-of-charge of EVs before peak trip hour
+    assumption_safety_margin : float or numpy.ndarray
+        [%] Assumed safety margin (minimum capacity SOC)
+    assumption_av_usable_battery_capacity : float or numpy.ndarray
+        [kwh] Average (storage) capacity of EV
+    assumption_nr_ev_per_trip : float or numpy.ndarray
+        [-] Number of EVs per trip
+    dtype : dtype
+        Data type used for the calculation and the capacities
+
+    Returns
+    -------
+    actual_v2g_capacity : numpy.ndarray
+        V2G capacity of every region (kWh), shape of inputs without intervals
+    actual_g2v_capacity : numpy.ndarray
+        G2V capacity of every region (kWh), shape of inputs without intervals
+
+    Note
+    ----
+    The assumptions can be given as arrays which broadcast against
+    the regions (e.g. a different V2G share for every region).
+    """
     # --------------------------------------
-    # 3. Calculate total vehicle battery capacity
+    # 1. Find peak demand hour and number of EVs in peak hour
     # --------------------------------------
-    total_battery_capacity = np.zeros((nr_of_regions))
-    for region_nr, reg_nr_EVs in enumerate(reg_max_nr_ev):
+    reg_peak_position_h_elec = np.argmax(reg_elec_24h, axis=-1)[..., np.newaxis]
 
-        reg_tot_battery_capacity = reg_nr_EVs * assumption_av_usable_battery_capacity
+    # Shape of the regions broadcast against all assumptions (e.g. (samples, regions))
+    shape = np.broadcast_shapes(reg_elec_24h.shape[:-1], *[np.shape(assumption) for assumption in (
+        assumption_ev_p_with_v2g_capability,
+        assumption_av_charging_state,
+        assumption_safety_margin,
+        assumption_av_usable_battery_capacity,
+        assumption_nr_ev_per_trip)])
 
-        total_battery_capacity[region_nr] = reg_tot_battery_capacity
+    reg_peak_demand_h_elec = np.take_along_axis(
+        reg_elec_24h, reg_peak_position_h_elec, axis=-1)[..., 0].astype(dtype)
+
+    reg_max_nr_ev = np.multiply(
+        np.take_along_axis(reg_trips_ev_24h, reg_peak_position_h_elec, axis=-1)[..., 0],
+        assumption_nr_ev_per_trip,
+        out=np.empty(shape, dtype=dtype))
 
-    return total_battery_capacity
-    '''
     # --------------------------------------
-    # 3. Calculate total EV battery capacity of all vehicles which can do V2G
+    # 2. Calculate total EV battery capacity of all vehicles which can do V2G
     # --------------------------------------
     # Calculate number of EVs with V2G capability
-    reg_nr_v2g_ev = reg_max_nr_ev * assumption_ev_p_with_v2g_capability
+    reg_nr_v2g_ev = np.multiply(
+        reg_max_nr_ev, assumption_ev_p_with_v2g_capability, out=np.empty(shape, dtype=dtype))
 
-    # Calculate demand in peak hour of all EVs with V2G capabilityies
-    average_demand_vehicle = reg_peak_demand_h_elec / reg_max_nr_ev
-    average_demand_vehicle[np.isnan(average_demand_vehicle)] = 0 #replace nan with 0
-    average_demand_vehicle[np.isinf(average_demand_vehicle)] = 0 #replace inf with 0
+    # Calculate average demand per vehicle in peak hour (0 if there are no vehicles)
+    average_demand_vehicle = np.divide(
+        reg_peak_demand_h_elec,
+        reg_max_nr_ev,
+        out=np.zeros(shape, dtype=dtype),
+        where=reg_max_nr_ev != 0)
 
     # Calculate peak demand of all vehicles with V2G capability
-    reg_peak_demand_h_elec_v2g_ev = average_demand_vehicle * reg_nr_v2g_ev
+    reg_peak_demand_h_elec_v2g_ev = np.multiply(
+        average_demand_vehicle, reg_nr_v2g_ev, out=average_demand_vehicle)
 
     # Calculate overall maximum capacity of all EVs with V2G capabilities (C_max)
     reg_max_capacity_v2g_ev = reg_nr_v2g_ev * assumption_av_usable_battery_capacity
 
     # --------------------------------------
-    # 4. Calculate flexible "EV battery capacity" used for G2V and v2g
+    # 3. Calculate flexible "EV battery capacity" used for G2V and V2G
     # -------------------------------------
+    # Actual used capacity of all vehicles with V2G capabilities including
+    # the capacity of the safety margin (C_min)
+    used_capacity = reg_max_capacity_v2g_ev * assumption_safety_margin
+    used_capacity += reg_peak_demand_h_elec_v2g_ev
 
-    # V2G capacity
-    actual_v2g_capacity = np.zeros((nr_of_regions))
+    # Capacity necessary for assumed average SOC of region (SOC_av)
+    average_soc_capacity = reg_max_capacity_v2g_ev * assumption_av_charging_state
 
-    # Calculated capacity of safety margin (C_min blue area)
-    capacity_safety_margin = reg_max_capacity_v2g_ev * assumption_safety_margin
+    # If average state of charging smaller than actual used capacity the V2G capacity gets reduced
+    actual_v2g_capacity = np.maximum(used_capacity, average_soc_capacity, out=used_capacity)
+    np.subtract(reg_max_capacity_v2g_ev, actual_v2g_capacity, out=actual_v2g_capacity)
+    np.clip(actual_v2g_capacity, 0, None, out=actual_v2g_capacity)
 
-    # Itereage regions and check whether the actual consumption considering the safety margin is larger
-    # than the demand based on the average state-of-charge assumption
-    for region_nr, reg_peak_h_capacity in enumerate(reg_max_capacity_v2g_ev):
+    # Capacity which can be charged from the grid at average SOC
+    actual_g2v_capacity = np.subtract(
+        reg_max_capacity_v2g_ev, average_soc_capacity, out=average_soc_capacity)
+    np.clip(actual_g2v_capacity, 0, None, out=actual_g2v_capacity)
 
-        # Actual used capacity of all vehicles with V2G capabilities and minimum charging state
-        used_capacity_incl_margin = reg_peak_demand_h_elec_v2g_ev[region_nr] + capacity_safety_margin[region_nr]
+    return actual_v2g_capacity, actual_g2v_capacity
 
-        # Cannot be higher than maximum storage capacity
-        #if (used_capacity_incl_margin > reg_peak_demand_h_elec_v2g_ev[region_nr]):
-        #    used_capacity = reg_peak_demand_h_elec_v2g_ev[region_nr]
-        #else:
-        #    pass
-        #used_capacity = reg_peak_demand_h_elec_v2g_ev[region_nr]
-        used_capacity = used_capacity_incl_margin
+def fleet_capacity_yh(
+        reg_trips_ev_24h,
+        et_demand_yh,
+        reg_arrivals_ev_24h=None,
+        nr_of_ev=None,
+        assumption_trip_duration=1,
+        assumption_ev_p_with_v2g_capability=0.5,
+        assumption_av_charging_state=0.5,
+        assumption_safety_margin=0.1,
+        assumption_av_usable_battery_capacity=30.0,
+        assumption_nr_ev_per_trip=1,
+        dtype=float
+    ):
+    """Simulates the state-of-charge of the EV fleet of every region for
+    every hour of the year and calculates the hourly V2G and G2V capacity
 
-        # Capacity necessary for assumed average SOC of region (SOC_av)
-        average_soc_capacity = assumption_av_charging_state * reg_peak_h_capacity
+    All regions are calculated at once:
+    - Vehicles on the road: cumulative sum of departures minus arrivals
+    - Parked vehicles: fleet minus vehicles on the road
+    - Fleet energy: charged energy (`et_demand_yh`) minus energy used by
+      trips of every hour. The annual energy used by trips equals the
+      annual charged energy and is distributed over the departures
+    - The fleet energy starts at the average state-of-charge
+      `assumption_av_charging_state` and is added up hour by hour,
+      limited to the fleet capacity in every hour (saturating sum)
+    - V2G capacity: energy of the parked vehicles with V2G capability
+      above the safety margin
+    - G2V capacity: capacity of the parked vehicles with V2G capability
+      which is not charged
 
-        # If average state of charging smaller than actual used capacity the V2G capacity gets reduced
-        if used_capacity > average_soc_capacity:
-            v2g_capacity = reg_peak_h_capacity - used_capacity
+    Arguments
+    ---------
+    reg_trips_ev_24h : numpy.ndarray
+        Number of trips started in every region in every hour, shape
+        (regions, 24) (same for every day) or (regions, hours of year).
+        Leading batch axes are allowed
+    et_demand_yh : numpy.ndarray
+        Hourly electricity demand of EVs for every region in (kWh), shape
+        (regions, hours of year) (see `main_functions.load_curve_assignement`)
+    reg_arrivals_ev_24h : numpy.ndarray, optional
+        Number of trips ended in every region in every hour (same shape as
+        `reg_trips_ev_24h`). By default, trips end after
+        `assumption_trip_duration` hours
+    nr_of_ev : numpy.ndarray, optional
+        Number of EVs of every region (regions). By default the maximum
+        number of vehicles on the road at the same time
+    assumption_trip_duration : int
+        [h] Duration of trips if no arrivals are given
+    assumption_ev_p_with_v2g_capability : float or numpy.ndarray
+        [%] Percentage of EVs used for V2G and G2V
+    assumption_av_charging_state : float or numpy.ndarray
+        [%] Assumed average state-of-charge of the fleet
+    assumption_safety_margin : float or numpy.ndarray
+        [%] Assumed safety margin (minimum capacity SOC)
+    assumption_av_usable_battery_capacity : float or numpy.ndarray
+        [kwh] Average (storage) capacity of EV
+    assumption_nr_ev_per_trip : float or numpy.ndarray
+        [-] Number of EVs per trip
+    dtype : dtype
+        Data type used for the calculation and the capacities
 
-            if v2g_capacity < 0:
-                actual_v2g_capacity[region_nr] = 0
-            else:
-                # More is use than minimum SOC
-                actual_v2g_capacity[region_nr] = v2g_capacity
-        else:
-            v2g_capacity = reg_peak_h_capacity - average_soc_capacity
+    Returns
+    -------
+    v2g_capacity_yh : numpy.ndarray
+        V2G capacity of every region and hour (kWh), shape of `et_demand_yh`
+    g2v_capacity_yh : numpy.ndarray
+        G2V capacity of every region and hour (kWh), shape of `et_demand_yh`
+    soc_yh : numpy.ndarray
+        State-of-charge of the fleet of every region and hour (0 to 1)
+
+    Note
+    ----
+    Energy the fleet cannot store (or lacks) is lost, i.e. after the
+    fleet is full (or empty), the following hours start from the limit.
+    This is why the fleet energy is stepped through the hours (for all
+    regions at once) instead of clipping a cumulative sum.
+    """
+    nr_of_hours = et_demand_yh.shape[-1]
+
+    # --------------------------------------
+    # 1. Vehicles on the road and parked vehicles in every hour
+    # --------------------------------------
+    departures_yh = _get_hourly_values(reg_trips_ev_24h, nr_of_hours, dtype)
+    departures_yh *= assumption_nr_ev_per_trip
+
+    if reg_arrivals_ev_24h is None:
+        arrivals_yh = np.roll(departures_yh, assumption_trip_duration, axis=-1)
+    else:
+        arrivals_yh = _get_hourly_values(reg_arrivals_ev_24h, nr_of_hours, dtype)
+        arrivals_yh *= assumption_nr_ev_per_trip
+
+    # Vehicles on the road (at least 0 in every hour)
+    on_road_yh = np.subtract(departures_yh, arrivals_yh, out=arrivals_yh)
+    np.cumsum(on_road_yh, axis=-1, out=on_road_yh)
+    on_road_yh -= np.min(on_road_yh, axis=-1, keepdims=True)
+
+    if nr_of_ev is None:
+        nr_of_ev = np.max(on_road_yh, axis=-1)
+    nr_of_ev = np.asarray(nr_of_ev, dtype=dtype)[..., np.newaxis]
+
+    # Share of the fleet which is parked (without vehicles, the negative
+    # number of vehicles on the road is left and clipped to 0)
+    parked_p_yh = np.subtract(nr_of_ev, on_road_yh, out=on_road_yh)
+    np.divide(parked_p_yh, nr_of_ev, out=parked_p_yh, where=nr_of_ev != 0)
+    np.clip(parked_p_yh, 0, 1, out=parked_p_yh)
+
+    # --------------------------------------
+    # 2. Energy stored in the fleet in every hour
+    # --------------------------------------
+    fleet_capacity = nr_of_ev * assumption_av_usable_battery_capacity
+
+    # Energy used per trip so that the annual energy balance is zero
+    energy_per_departure = np.divide(
+        np.sum(et_demand_yh, axis=-1, keepdims=True, dtype=np.float64),
+        np.sum(departures_yh, axis=-1, keepdims=True, dtype=np.float64),
+        out=np.zeros(departures_yh.shape[:-1] + (1, ), dtype=np.float64),
+        where=np.sum(departures_yh, axis=-1, keepdims=True) != 0).astype(dtype)
+
+    fleet_energy_yh = np.multiply(departures_yh, -energy_per_departure, out=departures_yh)
+    fleet_energy_yh += et_demand_yh
+
+    # Saturating sum from the average state-of-charge (hours as leading
+    # axis, so that every step works on a contiguous row of all regions)
+    fleet_energy_hy = np.moveaxis(fleet_energy_yh, -1, 0).copy()
+    max_energy = np.broadcast_to(fleet_capacity[..., 0], fleet_energy_hy.shape[1:])
+
+    energy = np.empty(fleet_energy_hy.shape[1:], dtype=dtype)
+    energy[...] = max_energy * assumption_av_charging_state
+
+    for hour_energy in fleet_energy_hy:
+        energy += hour_energy
+        np.maximum(energy, 0, out=energy)
+        np.minimum(energy, max_energy, out=energy)
+        hour_energy[...] = energy
+
+    fleet_energy_yh[...] = np.moveaxis(fleet_energy_hy, 0, -1)
+
+    soc_yh = np.divide(
+        fleet_energy_yh,
+        fleet_capacity,
+        out=np.zeros(fleet_energy_yh.shape, dtype=dtype),
+        where=fleet_capacity != 0)
+
+    # --------------------------------------
+    # 3. Capacity of the parked vehicles with V2G capability
+    # --------------------------------------
+    parked_p_yh *= assumption_ev_p_with_v2g_capability
+
+    parked_energy_yh = np.multiply(fleet_energy_yh, parked_p_yh, out=fleet_energy_yh)
+    parked_capacity_yh = np.multiply(parked_p_yh, fleet_capacity, out=parked_p_yh)
+
+    # Energy above the safety margin which can be discharged
+    v2g_capacity_yh = parked_capacity_yh * -assumption_safety_margin
+    v2g_capacity_yh += parked_energy_yh
+    np.clip(v2g_capacity_yh, 0, None, out=v2g_capacity_yh)
+
+    # Capacity which can be charged from the grid
+    g2v_capacity_yh = np.subtract(parked_capacity_yh, parked_energy_yh, out=parked_capacity_yh)
+    np.clip(g2v_capacity_yh, 0, None, out=g2v_capacity_yh)
+
+    return v2g_capacity_yh, g2v_capacity_yh, soc_yh
+
+def _get_hourly_values(values_24h, nr_of_hours, dtype):
+    """Get values of every hour of the year (copy) from values of
+    every hour of a day (repeated for every day) or of the year
+    """
+    if values_24h.shape[-1] == nr_of_hours:
+        return np.array(values_24h, dtype=dtype)
+
+    assert values_24h.shape[-1] == 24 and nr_of_hours % 24 == 0
 
-            if v2g_capacity < 0:
-                actual_v2g_capacity[region_nr] = 0
-            else:
-                # Less is use than minimum SOC
-                actual_v2g_capacity[region_nr] = v2g_capacity
+    values_yh = np.empty(values_24h.shape[:-1] + (nr_of_hours // 24, 24), dtype=dtype)
+    values_yh[...] = values_24h[..., np.newaxis, :]
 
-    return actual_v2g_capacity'''
+    return values_yh.reshape(values_24h.shape[:-1] + (nr_of_hours, ))
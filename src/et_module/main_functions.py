@@ -2,12 +2,33 @@
 """
 import os
 import sys
-import csv
 import logging
+import itertools
+import functools
+import collections
 import numpy as np
 import pandas as pd
 
+try:
+    import scipy.sparse
+except ImportError:
+    scipy = None
+
 from et_module import diffusion_functions
+from et_module import instrumentation
+
+# Relative tolerance of hourly demand calculated with a dtype compared to float64
+DTYPE_RTOL = {
+    np.dtype(np.float64): 1e-12,
+    np.dtype(np.float32): 1e-6}
+
+# Day types of daily load profiles (order of rows in load profile files)
+DAY_TYPES = ['weekday', 'weekend', 'holiday']
+
+# Anchor load profiles of every charging scenario (ordered by year)
+CHARGING_SCENARIO_PROFILES = {
+    'unsheduled': ['av_lp_2015.csv'],
+    'sheduled': ['av_lp_2015.csv', 'av_lp_2050.csv']}
 
 def load_curve_assignement(
         curr_yr,
@@ -17,7 +38,13 @@ def load_curve_assignement(
         load_profiles,
         regions,
         charging_scenario,
-        diffusion='linear'
+        diffusion='linear',
+        profile_cache=None,
+        output='dense',
+        dtype=float,
+        out=None,
+        fingerprints=None,
+        scheduler=None
     ):
     """Assign input electrictiy demand (given as "tranport service"
     for every hour in a year) to an hourly energy demand load profile
@@ -31,13 +58,16 @@ def load_curve_assignement(
         Base year of simulation
     yr_until_changed : int
         Year until changed is fully implemented
-    et_service_demand_yh : dict
-        Transport energy demand for every region (hourly demand)
-    load_profiles : list
+    et_service_demand_yh : dict, array or pandas.DataFrame
+        Transport energy demand for every region (hourly demand). Either
+        a dict with region names as keys, an array of shape (regions, 365, 24)
+        or (regions, 8760) ordered as `regions` or a DataFrame with
+        region names as index (see `get_service_demand_y`)
+    load_profiles : list or LoadProfileRegistry
         Load profile objects
-    regions : list
+    regions : list or RegionIndex
         All region names
-    charging_scenario : str
+    charging_scenario : str or ProfileAssignment
         Scenario
 
             'sheduled' :
@@ -45,6 +75,9 @@ def load_curve_assignement(
             'sheduled' : 
             TODO
 
+        With a `ProfileAssignment`, every region gets its assigned (mixture
+        of) load profiles of the charging scenarios of the profile library
+
     diffusion : str
         Type of diffusion between base year and end year load profile
 
@@ -52,18 +85,491 @@ def load_curve_assignement(
 
             'sigmoid':  Sigmoid change over time towards future load profile
 
+    profile_cache : ProfileCache, optional
+        Cache of blended current year load profiles. If given, the
+        profile is only calculated once for the same years, scenario
+        and diffusion (e.g. in repeated iterations within a timestep)
+    output : str
+        Type of output
+
+            'dense':        Array with hourly demand of every region
+
+            'factorized':   `FactorizedLoadCurve` with annual demand of every
+                            region and the shared load profile. Hours are
+                            only calculated on demand
+
+    dtype : dtype
+        Data type of the hourly demand (e.g. `np.float32` to halve memory).
+        Annual demand is always summed in float64. With float32, results
+        agree with float64 within a relative tolerance of `DTYPE_RTOL`
+    out : array, optional
+        Array of shape (regions, 8760) the hourly demand is written into
+        (only 'dense' output), e.g. the slice of the simulation year of
+        a memory-mapped array (see `open_demand_memmap`)
+    fingerprints : RegionFingerprints, optional
+        Fingerprints of the annual demand of every region of the previous
+        call. If given, only the rows of regions whose annual demand
+        changed (or all rows if the current year profile, the profile
+        assignment or the scheduler changed) are recalculated. Without `out`, the array of the previous call is
+        updated and returned
+    scheduler : SmartChargingScheduler, optional
+        Scheduler of the 'sheduled' charging scenario. If given, the daily
+        charging energy of every region is shifted into the hours with
+        the lowest demand (see `charging_functions`). Not used for other
+        charging scenarios
+
     Returns
     =========
-    et_demand_yh : array
+    et_demand_yh : array or FactorizedLoadCurve
         Houlry demand, np.array(reg_array_nr, 8760 timesteps)
     """
-    et_demand_yh = np.zeros((len(regions), 365 * 24), dtype=float)
+
+    # --------------------------------------------------------------------
+    # Calculate current year profile with base year and profile from 2015
+    # --------------------------------------------------------------------
+    if isinstance(charging_scenario, ProfileAssignment):
+        # Current year profile of every profile of the library
+        profile_assignment = charging_scenario
+        if profile_assignment.regions != get_region_index(regions):
+            sys.exit("Error: Regions of the profile assignment are not the regions (in the same order)")
+
+        profile_yh_cy = np.stack([
+            get_profile_yh_cy(
+                curr_yr=curr_yr,
+                base_yr=base_yr,
+                yr_until_changed=yr_until_changed,
+                load_profiles=load_profiles,
+                charging_scenario=profile_name,
+                diffusion=diffusion,
+                profile_cache=profile_cache)
+            for profile_name in profile_assignment.profile_names])
+        nr_of_hours = profile_yh_cy[0].size
+    else:
+        profile_assignment = None
+        profile_yh_cy = get_profile_yh_cy(
+            curr_yr=curr_yr,
+            base_yr=base_yr,
+            yr_until_changed=yr_until_changed,
+            load_profiles=load_profiles,
+            charging_scenario=charging_scenario,
+            diffusion=diffusion,
+            profile_cache=profile_cache)
+        nr_of_hours = profile_yh_cy.size
+
+    assert np.all(np.round(np.sum(profile_yh_cy.reshape(-1, nr_of_hours), axis=1), 3) == 1)
+
+    # ----------
+    # Plotting
+    # ----------
+    #from et_module import plotting_functions
+    #fig_lp.plot_lp_dh(profile_yh_cy, day=2)
+
+    # ------------------------------------
+    # Disaggregate for every region
+    # ------------------------------------
+    with instrumentation.stage('disaggregation') as stage:
+
+        # Sum total service demand of every region to annual demand
+        et_service_demand_y = get_service_demand_y(et_service_demand_yh, regions)
+
+        if scheduler is not None and charging_scenario != 'sheduled':
+            scheduler = None
+
+        if output == 'factorized':
+            if scheduler is not None or profile_assignment is not None:
+                sys.exit("Error: Smart charging and regional load profiles cannot be used with factorized output")
+            return FactorizedLoadCurve(et_service_demand_y, profile_yh_cy, dtype=dtype)
+        elif output != 'dense':
+            sys.exit("Error: No valid output option is selected")
+
+        if out is None and fingerprints is not None:
+            out = fingerprints.get_out((len(regions), nr_of_hours), dtype)
+
+        if out is None:
+            et_demand_yh = np.zeros((len(regions), nr_of_hours), dtype=dtype)
+        else:
+            assert out.shape == (len(regions), nr_of_hours)
+            et_demand_yh = out
+
+        if logging.root.isEnabledFor(logging.DEBUG):
+            logging.debug(
+                "Assinging new shape to %s regions (profile sum: %s)",
+                len(regions), np.sum(profile_yh_cy))
+
+        # Only regions whose annual demand changed are recalculated
+        # (all regions if `region_nrs` is None). A change of the profiles,
+        # the profile assignment or the scheduler (or turning it on or off)
+        # changes all regions
+        region_nrs = None
+        if fingerprints is not None:
+            shared = {'profile_yh_cy': profile_yh_cy}
+            if profile_assignment is not None:
+                shared.update(
+                    assignment_indptr=profile_assignment.indptr,
+                    assignment_indices=profile_assignment.indices,
+                    assignment_weights=profile_assignment.weights)
+            if scheduler is not None:
+                shared.update(scheduler.get_state())
+
+            dirty = fingerprints.update(
+                get_fingerprints(et_service_demand_y, et_service_demand_y.shape),
+                et_demand_yh,
+                shared=shared)
+
+            if not dirty.all():
+                region_nrs = np.flatnonzero(dirty)
+
+        if profile_assignment is None:
+            # Multiply the annual total service demand with yh load profile
+            # (outer product of regions and 8760 timesteps)
+            if region_nrs is None:
+                np.multiply(
+                    et_service_demand_y[:, np.newaxis],
+                    profile_yh_cy.reshape(1, -1),
+                    out=et_demand_yh)
+            elif region_nrs.size > 0:
+                et_demand_yh[region_nrs] = et_service_demand_y[region_nrs, np.newaxis] * profile_yh_cy.reshape(1, -1)
+        else:
+            # Multiply the profile weights of every region scaled by the annual
+            # total service demand with the yh load profiles (sparse matmul)
+            profiles_yh_cy = profile_yh_cy.reshape(-1, nr_of_hours)
+
+            if region_nrs is None:
+                profile_assignment.dot(
+                    profiles_yh_cy, scale=et_service_demand_y, out=et_demand_yh)
+            elif region_nrs.size > 0:
+                et_demand_yh[region_nrs] = profile_assignment.dot(
+                    profiles_yh_cy, scale=et_service_demand_y[region_nrs], region_nrs=region_nrs)
+
+        # Shift charging into the hours with the lowest demand
+        if scheduler is not None:
+            if region_nrs is None:
+                scheduler.schedule(et_demand_yh, out=et_demand_yh)
+            elif region_nrs.size > 0:
+                et_demand_yh[region_nrs] = scheduler.schedule(
+                    et_demand_yh[region_nrs], region_nrs=region_nrs)
+
+        stage.add_array(et_demand_yh)
+
+    return et_demand_yh
+
+def load_curve_assignement_chunks(
+        curr_yr,
+        base_yr,
+        yr_until_changed,
+        et_service_demand_yh,
+        load_profiles,
+        regions,
+        charging_scenario,
+        diffusion='linear',
+        profile_cache=None,
+        chunk_size=1000,
+        dtype=float
+    ):
+    """Generator version of `load_curve_assignement` which yields
+    the hourly demand in chunks of regions, so that the output
+    can be written piece by piece without holding all regions in memory.
+
+    Arguments
+    =========
+    curr_yr, base_yr, yr_until_changed, et_service_demand_yh, load_profiles,
+    regions, charging_scenario, diffusion, profile_cache, dtype
+        See `load_curve_assignement`
+    chunk_size : int
+        Maximum number of regions per chunk
+
+    Yields
+    ======
+    region_nrs : slice
+        Position of the regions of the chunk in `regions`
+    et_demand_yh : array
+        Hourly demand of the regions of the chunk, np.array(chunk regions, 8760)
+    """
+    load_curve = load_curve_assignement(
+        curr_yr=curr_yr,
+        base_yr=base_yr,
+        yr_until_changed=yr_until_changed,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario=charging_scenario,
+        diffusion=diffusion,
+        profile_cache=profile_cache,
+        output='factorized',
+        dtype=dtype)
+
+    for region_nr_start in range(0, len(regions), chunk_size):
+        region_nrs = slice(region_nr_start, min(region_nr_start + chunk_size, len(regions)))
+
+        yield region_nrs, load_curve.get_regions(region_nrs)
+
+def load_curve_assignement_years(
+        curr_yrs,
+        base_yr,
+        yr_until_changed,
+        et_service_demand_yh,
+        load_profiles,
+        regions,
+        charging_scenario,
+        diffusion='linear',
+        output='dense',
+        dtype=float,
+        out=None
+    ):
+    """Assign input electricity demand to hourly load profiles for
+    several simulation years in one call.
+
+    Same calculation as `load_curve_assignement`, but the diffusion
+    fractions of all years are calculated as a vector and the base
+    year and end year profiles are blended with one broadcast.
+
+    Arguments
+    =========
+    curr_yrs : list or array
+        Simulation years
+    base_yr : int
+        Base year of simulation
+    yr_until_changed : int
+        Year until changed is fully implemented
+    et_service_demand_yh : dict, array or pandas.DataFrame
+        Transport energy demand for every region (hourly demand),
+        see `get_service_demand_y`
+    load_profiles : list or LoadProfileRegistry
+        Load profile objects
+    regions : list or RegionIndex
+        All region names
+    charging_scenario : str
+        Scenario ('sheduled' or 'unsheduled')
+    diffusion : str
+        Type of diffusion between base year and end year load profile
+        ('linear' or 'sigmoid')
+    output : str
+        Type of output ('dense' or 'factorized', see `load_curve_assignement`)
+    dtype : dtype
+        Data type of the hourly demand (see `load_curve_assignement`)
+    out : array, optional
+        Array of shape (years, regions, 8760) the hourly demand is written
+        into (only 'dense' output), e.g. a memory-mapped array
+        (see `open_demand_memmap`)
+
+    Returns
+    =========
+    et_demand_yh : array or FactorizedLoadCurve
+        Hourly demand, np.array(years, reg_array_nr, 8760 timesteps)
+    """
+    curr_yrs = np.asarray(curr_yrs)
 
     # -------------------
-    # Calculate diffusion
+    # Calculate diffusion of all years
     # -------------------
+    with instrumentation.stage('diffusion'):
+        simulation_yrs_p = np.array(calc_diffusion_p(
+            curr_yr=curr_yrs,
+            base_yr=base_yr,
+            yr_until_changed=yr_until_changed,
+            diffusion=diffusion), dtype=float, ndmin=1)
+
+    # --------------------------------------------------------------------
+    # Blend base year and end year profile for all years (years, 365, 24)
+    # --------------------------------------------------------------------
+    with instrumentation.stage('profile_blending') as stage:
+        load_profile_registry = get_load_profile_registry(load_profiles)
+
+        profiles_yh_cy = load_profile_registry.blend(
+            charging_scenario, simulation_yrs_p)
+
+        stage.add_array(profiles_yh_cy)
+
+    assert np.all(np.round(np.sum(profiles_yh_cy, axis=(1, 2)), 3) == 1)
+
+    # ------------------------------------
+    # Disaggregate for every region and year
+    # ------------------------------------
+    with instrumentation.stage('disaggregation') as stage:
+        et_service_demand_y = get_service_demand_y(et_service_demand_yh, regions)
+
+        if output == 'factorized':
+            return FactorizedLoadCurve(et_service_demand_y, profiles_yh_cy, dtype=dtype)
+        elif output != 'dense':
+            sys.exit("Error: No valid output option is selected")
+
+        if out is not None:
+            assert out.shape == (len(curr_yrs), len(regions), profiles_yh_cy[0].size)
+            dtype = out.dtype
+
+        et_demand_yh = np.multiply(
+            et_service_demand_y[np.newaxis, :, np.newaxis],
+            profiles_yh_cy.reshape(len(curr_yrs), 1, -1),
+            dtype=dtype,
+            out=out)
+
+        stage.add_array(et_demand_yh)
+
+    return et_demand_yh
+
+def open_demand_memmap(
+        path,
+        nr_of_years,
+        nr_of_regions,
+        dtype=float,
+        mode='w+',
+        nr_of_hours=8760
+    ):
+    """Create (or open) a memory-mapped .npy file for the hourly
+    demand of several simulation years
+
+    Every simulation year can be written directly into its slice with
+    the `out` argument of `load_curve_assignement`. The file can later
+    be opened without copying with `np.load(path, mmap_mode='r')`.
+
+    Arguments
+    =========
+    path : str
+        Path to .npy file
+    nr_of_years : int
+        Number of simulation years
+    nr_of_regions : int
+        Number of regions
+    dtype : dtype
+        Data type of the hourly demand
+    mode : str
+        'w+' to create a new file, 'r+' to open an existing file
+    nr_of_hours : int
+        Number of hours in a year (8784 for leap years with day type profiles)
+
+    Returns
+    =======
+    et_demand_yh : numpy.memmap
+        Memory-mapped array of shape (years, regions, 8760)
+    """
+    if mode == 'w+':
+        et_demand_yh = np.lib.format.open_memmap(
+            path,
+            mode=mode,
+            dtype=dtype,
+            shape=(nr_of_years, nr_of_regions, nr_of_hours))
+    else:
+        et_demand_yh = np.lib.format.open_memmap(path, mode=mode)
+        assert et_demand_yh.shape == (nr_of_years, nr_of_regions, nr_of_hours)
+
+    return et_demand_yh
+
+def get_service_demand_y(et_service_demand_yh, regions):
+    """Sum the hourly transport service demand of every region
+    to an annual demand
+
+    Arguments
+    =========
+    et_service_demand_yh : dict, array or pandas.DataFrame
+        Transport energy demand for every region (hourly demand)
+
+            dict :          {region: array(365, 24)}
+
+            array :         array(regions, 365, 24) or array(regions, 8760)
+                            with rows in the order of `regions`
+
+            DataFrame :     Region names as index, hours as columns
+
+    regions : list or RegionIndex
+        All region names
+
+    Returns
+    =======
+    et_service_demand_y : array (regions)
+        Annual demand of every region (summed in float64)
+    """
+    if isinstance(et_service_demand_yh, dict):
+        # Adapter for dict input: sums in the order of the keys and a
+        # single gather into the order of `regions` (cached positions)
+        et_service_demand_y = get_region_index(et_service_demand_yh.keys()).reindex(
+            np.fromiter(
+                (np.sum(demand_yh, dtype=np.float64) for demand_yh in et_service_demand_yh.values()),
+                dtype=float,
+                count=len(et_service_demand_yh)),
+            regions)
+
+    elif isinstance(et_service_demand_yh, pd.DataFrame):
+        et_service_demand_y = et_service_demand_yh.loc[list(regions)].to_numpy().sum(axis=1, dtype=np.float64)
+
+    else:
+        et_service_demand_yh = np.asarray(et_service_demand_yh)
+        assert et_service_demand_yh.shape[0] == len(regions)
+
+        et_service_demand_y = et_service_demand_yh.reshape(len(regions), -1).sum(axis=1, dtype=np.float64)
+
+    return et_service_demand_y.astype(float, copy=False)
+
+def get_fingerprints(arrays, shape):
+    """Calculate a fingerprint of the values of every region
+
+    The fingerprint is a linear hash of the bits of all float64 values
+    of a region with odd multipliers (modulo 2**64), so changing a single
+    value always changes the fingerprint.
+
+    Arguments
+    =========
+    arrays : array or tuple
+        Array(s) with the regions (or batch axes and regions) as leading
+        axes of shape `shape`
+    shape : tuple
+        Shape of the leading axes
+
+    Returns
+    =======
+    fingerprints : array
+        Fingerprint (uint64) of every region, array of shape `shape`
+    """
+    if not isinstance(arrays, tuple):
+        arrays = (arrays, )
+
+    nr_of_rows = int(np.prod(shape, dtype=np.int64))
+
+    values = np.concatenate([
+        np.asarray(array, dtype=np.float64).reshape(nr_of_rows, -1)
+        for array in arrays], axis=1)
+
+    return np.sum(
+        values.view(np.uint64) * _get_fingerprint_multipliers(values.shape[1]),
+        axis=1,
+        dtype=np.uint64).reshape(shape)
+
+@functools.lru_cache(maxsize=16)
+def _get_fingerprint_multipliers(nr_of_values):
+    """Get fixed random odd multipliers of the fingerprints
+    """
+    multipliers = np.random.default_rng(0).integers(
+        0, 2**64, size=nr_of_values, dtype=np.uint64, endpoint=False) | np.uint64(1)
+    multipliers.flags.writeable = False
+
+    return multipliers
+
+def calc_diffusion_p(curr_yr, base_yr, yr_until_changed, diffusion, sig_midpoint=0, sig_steeppness=1):
+    """Calculate the fraction of the change between the base year and
+    end year load profile which is implemented in the current year
+
+    Arguments
+    =========
+    curr_yr : int or array
+        Current simulation year(s)
+    base_yr : int
+        Base year of simulation
+    yr_until_changed : int or array
+        Year until changed is fully implemented
+    diffusion : str
+        Type of diffusion ('linear' or 'sigmoid')
+    sig_midpoint : float or array
+        Mid point of sigmoid diffusion
+    sig_steeppness : float or array
+        Steepness of sigmoid diffusion
+
+    Returns
+    =======
+    simulation_year_p : float or array
+        Fraction of change in current year(s), 0 in the base year and 1
+        from `yr_until_changed` on (the base year has priority)
+    """
     if diffusion == 'linear':
-        simulation_year_p = diffusion_functions.linear_diff(
+        simulation_year_p = diffusion_functions.linear_diff_array(
             base_yr=base_yr,
             curr_yr=curr_yr,
             value_start=0,
@@ -71,83 +577,143 @@ def load_curve_assignement(
             yr_until_changed=yr_until_changed)
 
     elif diffusion == 'sigmoid':
-        # Default sigmoid parameters
-        simulation_year_p = diffusion_functions.sigmoid_diffusion(
+        simulation_year_p = diffusion_functions.sigmoid_diffusion_array(
             base_yr=base_yr,
             curr_yr=curr_yr,
             end_yr=yr_until_changed,
-            sig_midpoint=0,
-            sig_steeppness=1)
+            sig_midpoint=sig_midpoint,
+            sig_steeppness=sig_steeppness)
     else:
         sys.exit("Error: No diffusion option is selected")
-    # --------------------------------------------------------------------
-    # Calculate current year profile with base year and profile from 2015
-    # --------------------------------------------------------------------
 
-    # Get base year load profile
-    for load_profile in load_profiles:
-        if load_profile.name == 'av_lp_2015.csv':
-            profile_yh_by = load_profile.shape_yh
+    # Clamp to the end year profile after the year until changed and to
+    # the base year profile in the base year
+    curr_yr = np.asarray(curr_yr)
+    simulation_year_p = np.where(
+        curr_yr == base_yr, 0.0, np.where(curr_yr >= yr_until_changed, 1.0, simulation_year_p))
+
+    if simulation_year_p.ndim == 0:
+        return float(simulation_year_p)
+
+    return simulation_year_p
 
-    # Get future year load profile
-    for load_profile in load_profiles:
+def get_profile_yh_cy(
+        curr_yr,
+        base_yr,
+        yr_until_changed,
+        load_profiles,
+        charging_scenario,
+        diffusion,
+        profile_cache=None
+    ):
+    """Calculate the current year load profile by blending the
+    base year and end year load profile
 
-        if charging_scenario == 'unsheduled':
+    Arguments
+    =========
+    curr_yr : int
+        Current simulation year
+    base_yr : int
+        Base year of simulation
+    yr_until_changed : int
+        Year until changed is fully implemented
+    load_profiles : list or LoadProfileRegistry
+        Load profile objects
+    charging_scenario : str
+        Scenario ('sheduled' or 'unsheduled')
+    diffusion : str
+        Type of diffusion ('linear' or 'sigmoid')
+    profile_cache : ProfileCache, optional
+        Cache to look up and store the blended profile
 
-            # Unsheduled load profile (same as base year)
-            if load_profile.name == 'av_lp_2015.csv':
-                profile_yh_ey = load_profile.shape_yh
+    Returns
+    =======
+    profile_yh_cy : array (365, 24)
+        Current year load profile
+    """
+    if profile_cache is not None:
+        load_profile_registry = profile_cache.get_registry(load_profiles)
 
-        elif charging_scenario == 'sheduled':
+        cache_key = (
+            curr_yr, base_yr, yr_until_changed, charging_scenario, diffusion,
+            load_profile_registry.get_scenario_versions(charging_scenario))
 
-            # Sheduled load profile
-            if load_profile.name == 'av_lp_2050.csv':
-                profile_yh_ey = load_profile.shape_yh
-    
-    if base_yr == curr_yr:
-        profile_yh_cy = profile_yh_by
-    elif curr_yr == yr_until_changed or curr_yr > yr_until_changed:
-        profile_yh_cy = profile_yh_ey
+        profile_yh_cy = profile_cache.get(cache_key)
+        if profile_yh_cy is not None:
+            return profile_yh_cy
     else:
+        load_profile_registry = get_load_profile_registry(load_profiles)
 
-        # Calculate difference between by and ey
-        diff_profile = profile_yh_ey - profile_yh_by
+    # Calculate diffusion
+    with instrumentation.stage('diffusion'):
+        simulation_year_p = calc_diffusion_p(
+            curr_yr=curr_yr,
+            base_yr=base_yr,
+            yr_until_changed=yr_until_changed,
+            diffusion=diffusion)
 
-        # Calculate difference up to cy
-        diff_profile_cy = diff_profile * simulation_year_p
+    with instrumentation.stage('profile_blending') as stage:
+        profile_yh_cy = load_profile_registry.blend(
+            charging_scenario, simulation_year_p)
 
-        # Add difference to by
-        profile_yh_cy = profile_yh_by + diff_profile_cy
+        stage.add_array(profile_yh_cy)
 
-    assert round(np.sum(profile_yh_cy), 3) == 1
+    if profile_cache is not None:
+        profile_cache.put(cache_key, profile_yh_cy)
 
-    # ----------
-    # Plotting
-    # ----------
-    #from et_module import plotting_functions
-    #fig_lp.plot_lp_dh(profile_yh_cy, day=2)
+    return profile_yh_cy
 
-    # ------------------------------------
-    # Disaggregate for every region
-    # ------------------------------------
-    for region_array_nr, region in enumerate(regions):
+def get_load_profile_registry(load_profiles):
+    """Get a `LoadProfileRegistry` of load profiles
+
+    Arguments
+    =========
+    load_profiles : list or LoadProfileRegistry
+        Load profile objects
+
+    Returns
+    =======
+    load_profile_registry : LoadProfileRegistry
+        Registry of the load profiles (the argument itself if it
+        already is a registry)
+    """
+    if isinstance(load_profiles, LoadProfileRegistry):
+        return load_profiles
+    else:
+        return LoadProfileRegistry(load_profiles)
 
-        # Sum total service demand to annual demand
-        et_service_demand_y = np.sum(et_service_demand_yh[region])
+def get_region_index(regions):
+    """Get a `RegionIndex` of region names
 
-        # Multiply the annual total service demand with yh load profile
-        reg_profile_yh = et_service_demand_y * profile_yh_cy
+    Arguments
+    =========
+    regions : list or RegionIndex
+        Region names
 
-        logging.debug(
-            "Assinging new shape {}  {} {}".format(
-                region, et_service_demand_y, np.sum(profile_yh_cy)))
+    Returns
+    =======
+    region_index : RegionIndex
+        Index of the regions (the argument itself if it already
+        is a region index)
 
-        # Reshape (365 days, 24hours) into 8760 timesteps
-        et_demand_yh[region_array_nr] = reg_profile_yh.reshape(8760)
+    Note
+    ====
+    The indexes of the last orderings of region names are cached, so
+    that their gather positions (`RegionIndex.get_reindexer`) are only
+    calculated once for every ordering.
+    """
+    if isinstance(regions, RegionIndex):
+        return regions
+    else:
+        return _get_region_index(tuple(regions))
 
-    return et_demand_yh
+@functools.lru_cache(maxsize=32)
+def _get_region_index(regions):
+    """Get the cached `RegionIndex` of a tuple of region names
+    """
+    return RegionIndex(regions)
 
-def get_load_profiles(path):
+def get_load_profiles(path, dtype=float, cache=True):
     """Read in all load profiles from csv files and store in
     `LoadProfile`.
 
@@ -155,6 +721,10 @@ def get_load_profiles(path):
     =========
     path : str
         Path where load profiles are stored
+    dtype : dtype
+        Data type of the load profiles
+    cache : bool
+        Whether a binary cache of the csv files is used (see `read_load_shapes`)
 
     Returns
     =======
@@ -174,12 +744,12 @@ def get_load_profiles(path):
         path_to_csv = os.path.join(path, name)
 
         # Read in csv load profile
-        lp_dh = read_load_shape(path_to_csv)
+        lp_dh = read_load_shape(path_to_csv, cache=cache)
 
-        lp_dh_p = lp_dh / 100 # convert percentage to fraction
+        lp_dh_p = (lp_dh / 100).astype(dtype) # convert percentage to fraction
 
         # Shape for every hour in a year (Assign same profile to every day)
-        shape_yd = np.full((365), 1/365)
+        shape_yd = np.full((365), 1/365, dtype=dtype)
 
         # Shape for every hour in a year (365) * (24)
         shape_yh = shape_yd[:, np.newaxis]  * lp_dh_p
@@ -189,71 +759,1159 @@ def get_load_profiles(path):
             name=name,
             year=name[-8:-4],
             shape_yd=shape_yd,
-            shape_yh=shape_yh)
+            shape_yh=shape_yh,
+            shape_dh=lp_dh_p)
 
         load_profiles.append(load_profile)
 
     return load_profiles
 
-def read_load_shape(path_to_csv):
-    """This function reads in a load profile from
-    a csv file of a single day.
+def get_day_type_profiles(path, names=None, cache=True):
+    """Read in load profiles with several day types (and months) from
+    csv files and store in `DayTypeProfile`.
+
+    Every row of a csv file is the daily profile of a day type
+    (in the order of `DAY_TYPES`). Files with 12 times as many rows
+    contain the day types of every month (January first).
 
     Arguments
     =========
-    path_to_csv : str
-        Path to csv file
+    path : str
+        Path where load profiles are stored
+    names : list, optional
+        Names of the csv files (default: files of `CHARGING_SCENARIO_PROFILES`)
+    cache : bool
+        Whether a binary cache of the csv files is used (see `read_load_shapes`)
 
     Returns
     =======
-    shape_dh : array (24)
-        Load profile
+    day_type_profiles : list
+        All day type profile objects
     """
-    with open(path_to_csv, 'r') as csvfile:
-        read_lines = csv.reader(csvfile, delimiter=',')
-        _headings = next(read_lines) # Skip first row
+    if names is None:
+        names = sorted(set(itertools.chain(*CHARGING_SCENARIO_PROFILES.values())))
 
-        for row in read_lines:
-            shape_dh = np.zeros((24), dtype=float)
-            for cnt, row_entry in enumerate(row):
-                shape_dh[int(_headings[cnt])] = float(row_entry)
+    day_type_profiles = []
+    for name in names:
+        shapes_dh = read_load_shapes(os.path.join(path, name), cache=cache)
 
-    return shape_dh
+        if shapes_dh.shape[0] % 12 == 0:
+            shapes_dh = shapes_dh.reshape(12, -1, 24)
 
-class LoadProfile(object):
-    """Class to store load profiles
+        day_type_profiles.append(
+            DayTypeProfile(
+                name=name,
+                year=name[-8:-4],
+                shapes_dh=shapes_dh))
+
+    return day_type_profiles
+
+def get_calendar_load_profiles(day_type_profiles, calendar_yr):
+    """Get the load profiles of all day type profiles assembled for
+    a calendar year (see `DayTypeProfile.get_load_profile`)
 
     Arguments
-    ----------
-    name : str
-        Name of load profile
-    year : int
-        Year of load profile
-    shape_yd : array
-        Yearly load profile
-    shape yh : array
-        Daily load profile
+    =========
+    day_type_profiles : list
+        Day type profile objects
+    calendar_yr : int
+        Calendar year
 
-    Note
-    ====
-    -   `Yearly load profile (yd)` can be used to derive the energy demand
-        of all days in year. This is achieved by multiplying total
-        annual demand with this _yd array with the array shape (365)
+    Returns
+    =======
+    load_profiles : list
+        Load profile objects with (365, 24) or (366, 24) shapes
+    """
+    return [
+        day_type_profile.get_load_profile(calendar_yr)
+        for day_type_profile in day_type_profiles]
 
-    -   `Daily load profile (yh)` can be used to derive the energy demand
-        of all hours in a year. This is achieved by multiplying total
+@functools.lru_cache(maxsize=64)
+def get_calendar(calendar_yr, holidays=()):
+    """Get month and day type of every day of a calendar year
+
+    Arguments
+    =========
+    calendar_yr : int
+        Calendar year
+    holidays : tuple
+        Dates of holidays (e.g. '2015-12-25')
+
+    Returns
+    =======
+    month_nrs : array (365) or (366)
+        Month of every day (0: January)
+    day_type_nrs : array (365) or (366)
+        Position of the day type of every day in `DAY_TYPES`
+    """
+    days = np.arange(
+        np.datetime64('{}-01-01'.format(calendar_yr)),
+        np.datetime64('{}-01-01'.format(calendar_yr + 1)),
+        dtype='datetime64[D]')
+
+    # 1970-01-01 was a Thursday (Monday: 0)
+    weekday_nrs = (days.astype(np.int64) + 3) % 7
+    month_nrs = days.astype('datetime64[M]').astype(np.int64) % 12
+
+    day_type_nrs = np.where(
+        weekday_nrs >= 5, DAY_TYPES.index('weekend'), DAY_TYPES.index('weekday'))
+    if holidays:
+        day_type_nrs[np.isin(days, np.array(holidays, dtype='datetime64[D]'))] = DAY_TYPES.index('holiday')
+
+    month_nrs.flags.writeable = False
+    day_type_nrs.flags.writeable = False
+
+    return month_nrs, day_type_nrs
+
+def read_load_shape(path_to_csv, cache=True):
+    """This function reads in a load profile from
+    a csv file of a single day.
+
+    Arguments
+    =========
+    path_to_csv : str
+        Path to csv file
+    cache : bool
+        Whether a binary cache of the csv file is used (see `read_load_shapes`)
+
+    Returns
+    =======
+    shape_dh : array (24)
+        Load profile (last row if the file contains several rows)
+    """
+    shapes_dh = read_load_shapes(path_to_csv, cache=cache)
+
+    if shapes_dh.shape[0] > 1:
+        logging.warning(
+            "%s contains %s load profiles, only the last is used",
+            path_to_csv, shapes_dh.shape[0])
+
+    return shapes_dh[-1]
+
+def read_load_shapes(path_to_csv, cache=True):
+    """Read in all load profiles (e.g. several day types or months)
+    from a csv file. The headings are the hour of the day (0-23)
+    of every column.
+
+    After parsing, the profiles are stored in a binary cache next to
+    the csv file (`<path_to_csv>.npz`) together with modification time
+    and size of the csv file. As long as the csv file is not changed,
+    later calls load the cache instead of parsing the csv file.
+
+    Arguments
+    =========
+    path_to_csv : str
+        Path to csv file
+    cache : bool
+        Whether the binary cache is used and written
+
+    Returns
+    =======
+    shapes_dh : array (rows, 24)
+        Load profiles
+    """
+    path_to_cache = path_to_csv + '.npz'
+    csv_stat = os.stat(path_to_csv)
+
+    if cache and os.path.isfile(path_to_cache):
+        with np.load(path_to_cache) as cached:
+            if cached['mtime_ns'] == csv_stat.st_mtime_ns and cached['size'] == csv_stat.st_size:
+                return cached['shapes_dh']
+
+    data = pd.read_csv(path_to_csv, sep=',', header=0, dtype=float)
+
+    # Headings need to be every hour of the day exactly once
+    try:
+        hours = np.array([int(heading) for heading in data.columns])
+    except ValueError:
+        sys.exit("Error: Headings of {} are not hours".format(path_to_csv))
+
+    if not np.array_equal(np.sort(hours), np.arange(24)):
+        sys.exit("Error: Headings of {} are not the hours 0-23".format(path_to_csv))
+
+    shapes_dh = np.zeros((data.shape[0], 24), dtype=float)
+    shapes_dh[:, hours] = data.to_numpy()
+
+    if cache:
+        # Write to temporary file first so that concurrent readers never see a partial cache
+        path_to_tmp = "{}.{}.tmp".format(path_to_cache, os.getpid())
+        try:
+            with open(path_to_tmp, 'wb') as cache_file:
+                np.savez(
+                    cache_file,
+                    shapes_dh=shapes_dh,
+                    mtime_ns=csv_stat.st_mtime_ns,
+                    size=csv_stat.st_size)
+            os.replace(path_to_tmp, path_to_cache)
+        except OSError:
+            logging.debug("Could not write load profile cache %s", path_to_cache)
+
+    return shapes_dh
+
+def get_peak_hours(values_yh, nr_of_peak_hours):
+    """Get the hours with the highest values of every region
+
+    Only the peak hours are sorted (`np.argpartition`), not all hours.
+
+    Arguments
+    =========
+    values_yh : array
+        Hourly values (e.g. demand) with hours as last axis,
+        e.g. (regions, 8760)
+    nr_of_peak_hours : int
+        Number of peak hours
+
+    Returns
+    =======
+    peak_hours : array
+        Position of the peak hours sorted by decreasing value (and
+        increasing hour for equal values), shape (..., nr_of_peak_hours)
+    peak_values : array
+        Values of the peak hours, shape (..., nr_of_peak_hours)
+
+    Note
+    ====
+    If several hours have the same value as the last peak hour,
+    any of them can be selected.
+    """
+    nr_of_peak_hours = min(nr_of_peak_hours, values_yh.shape[-1])
+
+    peak_hours = np.argpartition(
+        values_yh, -nr_of_peak_hours, axis=-1)[..., -nr_of_peak_hours:]
+    peak_values = np.take_along_axis(values_yh, peak_hours, axis=-1)
+
+    # Sort the peak hours only
+    order = np.lexsort((peak_hours, -peak_values), axis=-1)
+    peak_hours = np.take_along_axis(peak_hours, order, axis=-1)
+    peak_values = np.take_along_axis(peak_values, order, axis=-1)
+
+    return peak_hours, peak_values
+
+def get_peak_window(values_yh, nr_of_hours):
+    """Get the window of consecutive hours with the highest sum of
+    values of every region
+
+    The sums of all windows are calculated with one cumulative sum.
+
+    Arguments
+    =========
+    values_yh : array
+        Hourly values (e.g. demand) with hours as last axis,
+        e.g. (regions, 8760)
+    nr_of_hours : int
+        Number of hours of the window
+
+    Returns
+    =======
+    start_hours : array
+        First hour of the window with the highest sum, shape (...)
+    window_sums : array
+        Sum of the values of the window, shape (...)
+    """
+    assert 0 < nr_of_hours <= values_yh.shape[-1]
+
+    cumulative_sum = np.zeros(values_yh.shape[:-1] + (values_yh.shape[-1] + 1, ))
+    np.cumsum(values_yh, axis=-1, dtype=np.float64, out=cumulative_sum[..., 1:])
+
+    window_sums = cumulative_sum[..., nr_of_hours:] - cumulative_sum[..., :-nr_of_hours]
+
+    start_hours = np.argmax(window_sums, axis=-1)
+
+    return start_hours, np.take_along_axis(window_sums, start_hours[..., np.newaxis], axis=-1)[..., 0]
+
+def get_load_duration_curve(values_yh, nr_of_points=None):
+    """Get the load-duration curve (values sorted by decreasing value)
+    of every region
+
+    Arguments
+    =========
+    values_yh : array
+        Hourly values (e.g. demand) with hours as last axis,
+        e.g. (regions, 8760)
+    nr_of_points : int, optional
+        Number of points of the curve at equally spaced durations
+        (first point is the peak value, last point the minimum value).
+        Only these points are selected (`np.partition`) instead of
+        sorting all hours. By default all hours are returned
+
+    Returns
+    =======
+    load_duration_curve : array
+        Values sorted by decreasing value, shape (..., hours)
+        or (..., nr_of_points)
+    """
+    if nr_of_points is None:
+        return np.flip(np.sort(values_yh, axis=-1), axis=-1)
+
+    nr_of_values = values_yh.shape[-1]
+    durations = np.unique(np.round(
+        np.linspace(0, nr_of_values - 1, nr_of_points)).astype(int))
+
+    # Position of the points in the values sorted by increasing value
+    positions = nr_of_values - 1 - durations
+
+    return np.partition(values_yh, positions[::-1], axis=-1)[..., positions]
+
+class LoadProfile(object):
+    """Class to store load profiles
+
+    Arguments
+    ----------
+    name : str
+        Name of load profile
+    year : int
+        Year of load profile
+    shape_yd : array
+        Yearly load profile
+    shape yh : array
+        Daily load profile
+    shape_dh : array, optional
+        Hourly shape of a day (24). If the profile is factorized,
+        `shape_yh` is `shape_yd` times `shape_dh`
+
+    Note
+    ====
+    -   `Yearly load profile (yd)` can be used to derive the energy demand
+        of all days in year. This is achieved by multiplying total
+        annual demand with this _yd array with the array shape (365)
+
+    -   `Daily load profile (yh)` can be used to derive the energy demand
+        of all hours in a year. This is achieved by multiplying total
         annual demand with the this _yh array with the array shape (365, 24).
+
+    -   `version` is a unique number which changes every time a shape
+        is assigned. It is used as part of the key of `ProfileCache`.
     """
+    _versions = itertools.count()
+
     def __init__(
             self,
             name,
             year,
             shape_yd,
-            shape_yh
+            shape_yh=None,
+            shape_dh=None
         ):
         """Constructor
         """
+        if shape_yh is None:
+            shape_yh = shape_yd[:, np.newaxis] * shape_dh
+
         self.name = name
         self.year = year
         self.shape_yd = shape_yd
+        self.shape_dh = shape_dh
         self.shape_yh = shape_yh
+
+    def __setattr__(self, name, value):
+        """Assign a new version if a shape changes
+        """
+        object.__setattr__(self, name, value)
+        if name in ('shape_yd', 'shape_yh', 'shape_dh'):
+            object.__setattr__(self, 'version', next(LoadProfile._versions))
+
+class DayTypeProfile(object):
+    """Class to store daily load profiles of several day types
+    (and months) which are assembled to load profiles of a calendar year
+
+    Arguments
+    ----------
+    name : str
+        Name of load profile
+    year : int
+        Year of load profile
+    shapes_dh : array
+        Daily load profiles (24), (day types, 24) or (12, day types, 24)
+        with day types in the order of `DAY_TYPES`. With two day types,
+        holidays use the weekend profile. Every daily profile is
+        normalized to a sum of 1
+    day_weights : array, optional
+        Relative demand of a day of every day type, shape (day types)
+        or (12, day types). Default: same demand every day
+    holidays : list, optional
+        Dates of holidays (e.g. '2015-12-25')
+
+    Note
+    ====
+    The load profile of a calendar year is assembled with one index
+    gather over the daily profiles and is cached per calendar year.
+    Leap years have 366 days (8784 hours).
+    """
+    def __init__(
+            self,
+            name,
+            year,
+            shapes_dh,
+            day_weights=None,
+            holidays=None
+        ):
+        """Constructor
+        """
+        shapes_dh = np.asarray(shapes_dh, dtype=float)
+        if shapes_dh.ndim == 1:
+            shapes_dh = shapes_dh[np.newaxis, np.newaxis]
+        elif shapes_dh.ndim == 2:
+            shapes_dh = shapes_dh[np.newaxis]
+        assert shapes_dh.shape[0] in (1, 12) and shapes_dh.shape[1] <= len(DAY_TYPES)
+
+        if day_weights is None:
+            day_weights = np.ones(shapes_dh.shape[:2])
+        day_weights = np.broadcast_to(day_weights, shapes_dh.shape[:2])
+
+        self.name = name
+        self.year = year
+        self.shapes_dh = shapes_dh / np.sum(shapes_dh, axis=-1, keepdims=True)
+        self.day_weights = np.asarray(day_weights, dtype=float)
+        self.holidays = tuple(holidays or ())
+        self._load_profiles = {}
+
+    def get_load_profile(self, calendar_yr):
+        """Get the load profile of a calendar year
+
+        Arguments
+        ---------
+        calendar_yr : int
+            Calendar year
+
+        Returns
+        -------
+        load_profile : LoadProfile
+            Load profile with (365, 24) or (366, 24) shape (the same
+            object is returned for the same calendar year)
+        """
+        if calendar_yr not in self._load_profiles:
+            nr_of_months, nr_of_day_types = self.shapes_dh.shape[:2]
+
+            month_nrs, day_type_nrs = get_calendar(calendar_yr, self.holidays)
+
+            # Position of daily profile of every day
+            day_nrs = np.minimum(day_type_nrs, nr_of_day_types - 1)
+            if nr_of_months == 12:
+                day_nrs = month_nrs * nr_of_day_types + day_nrs
+
+            shape_yd = self.day_weights.reshape(-1)[day_nrs]
+            shape_yd = shape_yd / np.sum(shape_yd)
+
+            shape_yh = shape_yd[:, np.newaxis] * self.shapes_dh.reshape(-1, 24)[day_nrs]
+
+            self._load_profiles[calendar_yr] = LoadProfile(
+                name=self.name,
+                year=self.year,
+                shape_yd=shape_yd,
+                shape_yh=shape_yh)
+
+        return self._load_profiles[calendar_yr]
+
+class FactorizedLoadCurve(object):
+    """Hourly demand of all regions stored as annual demand of every
+    region and the shared load profile
+
+    The hourly demand of a region is the annual demand times the load
+    profile. Instead of storing (regions, 8760) values, only the
+    (regions) annual demand and the (365, 24) profile are stored and
+    hours are calculated on demand.
+
+    Arguments
+    ----------
+    et_service_demand_y : array
+        Annual demand of every region (regions)
+    profile_yh : array
+        Load profile (365, 24) or (years, 365, 24)
+    dtype : dtype
+        Default data type of the hourly demand
+
+    Note
+    ====
+    `np.asarray(load_curve)` or `to_array` materializes the dense
+    array with shape (regions, 8760) or (years, regions, 8760).
+    """
+    def __init__(self, et_service_demand_y, profile_yh, dtype=float):
+        """Constructor
+        """
+        self.et_service_demand_y = np.asarray(et_service_demand_y)
+        self.profile_yh = np.asarray(profile_yh)
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def shape(self):
+        return self.profile_yh.shape[:-2] + (
+            len(self.et_service_demand_y), self.profile_yh.shape[-2] * 24)
+
+    @property
+    def shape_yd(self):
+        """Share of annual demand of every day (365) or (years, 365)
+        """
+        return self.profile_yh.sum(axis=-1)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.to_array(dtype=dtype)
+
+    def to_array(self, dtype=None, out=None):
+        """Calculate hourly demand of all regions
+
+        Arguments
+        ---------
+        dtype : dtype, optional
+            Data type of the array
+        out : array, optional
+            Array of shape `shape` the demand is written into
+
+        Returns
+        -------
+        et_demand_yh : array
+            Hourly demand (regions, 8760) or (years, regions, 8760)
+        """
+        return self.get_regions(slice(None), dtype=dtype, out=out)
+
+    def get_regions(self, region_nrs, dtype=None, out=None):
+        """Calculate hourly demand of selected regions
+
+        Arguments
+        ---------
+        region_nrs : int, slice or array
+            Position of the regions
+        dtype : dtype, optional
+            Data type of the array (default: `dtype`)
+        out : array, optional
+            Array the demand is written into
+
+        Returns
+        -------
+        et_demand_yh : array
+            Hourly demand of the selected regions
+        """
+        reg_demand_y = self.et_service_demand_y[region_nrs]
+
+        if np.ndim(reg_demand_y) == 0:
+            profile_h = self.profile_yh.reshape(self.profile_yh.shape[:-2] + (-1,))
+        else:
+            reg_demand_y = reg_demand_y[:, np.newaxis]
+            profile_h = self.profile_yh.reshape(self.profile_yh.shape[:-2] + (1, -1))
+
+        if dtype is None and out is None:
+            dtype = self.dtype
+
+        return np.multiply(reg_demand_y, profile_h, dtype=dtype, out=out)
+
+    def get_total_yh(self):
+        """Hourly demand summed over all regions (8760) or (years, 8760)
+        """
+        profile_h = self.profile_yh.reshape(self.profile_yh.shape[:-2] + (-1,))
+
+        return np.sum(self.et_service_demand_y) * profile_h
+
+    def get_peak_h(self):
+        """Peak hourly demand of every region (regions) or (years, regions)
+        (for non-negative annual demand)
+        """
+        profile_peak = self.profile_yh.max(axis=(-2, -1))
+
+        return np.multiply.outer(profile_peak, self.et_service_demand_y)
+
+class LoadProfileRegistry(object):
+    """Registry of load profiles with lookup by name, year and
+    charging scenario
+
+    The (365, 24) shapes of all profiles are stored in one contiguous
+    array of shape (profiles, 365, 24). Every charging scenario has one
+    or several anchor profiles ordered by year. The anchors are placed
+    on the diffusion scale (0 at the first, 1 at the last anchor year)
+    and the current year profile is interpolated piecewise linearly
+    between the two neighbouring anchors.
+
+    Arguments
+    ----------
+    load_profiles : list
+        Load profile objects
+    scenario_profiles : dict, optional
+        Names of the anchor profiles of every charging scenario
+        (default: `CHARGING_SCENARIO_PROFILES`)
+
+    Note
+    ====
+    With two anchors this is the same as blending the base year and
+    end year profile. Three anchors (e.g. 2015/2030/2050) give a
+    piecewise interpolation with a kink at the middle anchor year.
+    """
+    def __init__(self, load_profiles, scenario_profiles=None):
+        """Constructor
+        """
+        if scenario_profiles is None:
+            scenario_profiles = CHARGING_SCENARIO_PROFILES
+
+        self.load_profiles = list(load_profiles)
+        self.scenario_profiles = scenario_profiles
+
+        self._nr_by_name = {}
+        self._nrs_by_year = collections.defaultdict(list)
+        for load_profile_nr, load_profile in enumerate(self.load_profiles):
+            self._nr_by_name[load_profile.name] = load_profile_nr
+            self._nrs_by_year[int(load_profile.year)].append(load_profile_nr)
+
+        self._versions = None
+        self._refresh()
+
+    def _refresh(self):
+        """Stack all shapes and anchors again if a shape of a load
+        profile has been assigned since the last stacking
+        """
+        versions = tuple(load_profile.version for load_profile in self.load_profiles)
+
+        if versions == self._versions:
+            return
+
+        self.stacked_yh = np.stack(
+            [load_profile.shape_yh for load_profile in self.load_profiles])
+
+        # Anchor profile numbers, positions and differences between anchors
+        self._scenarios = {}
+        for charging_scenario, names in self.scenario_profiles.items():
+            if not all(name in self._nr_by_name for name in names):
+                continue
+
+            anchor_nrs = np.array([self._nr_by_name[name] for name in names])
+            anchor_yrs = np.array(
+                [int(self.load_profiles[nr].year) for nr in anchor_nrs], dtype=float)
+
+            if len(anchor_nrs) > 1:
+                assert np.all(np.diff(anchor_yrs) > 0)
+                positions = (anchor_yrs - anchor_yrs[0]) / (anchor_yrs[-1] - anchor_yrs[0])
+            else:
+                positions = np.zeros((1))
+
+            anchors_yh = self.stacked_yh[anchor_nrs]
+            diffs_yh = anchors_yh[1:] - anchors_yh[:-1]
+
+            self._scenarios[charging_scenario] = (anchor_nrs, positions, diffs_yh)
+
+        self._versions = versions
+
+    def _get_scenario(self, charging_scenario):
+        """Get anchors of a charging scenario
+        """
+        self._refresh()
+
+        if charging_scenario not in self._scenarios:
+            sys.exit("Error: No load profiles for charging scenario {}".format(
+                charging_scenario))
+
+        return self._scenarios[charging_scenario]
+
+    def get(self, name):
+        """Get load profile by name
+        """
+        return self.load_profiles[self._nr_by_name[name]]
+
+    def get_year(self, year):
+        """Get all load profiles of a year
+        """
+        return [self.load_profiles[nr] for nr in self._nrs_by_year.get(int(year), [])]
+
+    def get_scenario(self, charging_scenario):
+        """Get anchor load profiles of a charging scenario ordered by year
+        """
+        anchor_nrs, _, _ = self._get_scenario(charging_scenario)
+
+        return [self.load_profiles[nr] for nr in anchor_nrs]
+
+    def get_scenario_versions(self, charging_scenario):
+        """Get versions of the anchor load profiles of a charging scenario
+        """
+        return tuple(
+            load_profile.version for load_profile in self.get_scenario(charging_scenario))
+
+    def blend(self, charging_scenario, simulation_year_p, days=None):
+        """Interpolate the anchor profiles of a charging scenario
+
+        Arguments
+        ---------
+        charging_scenario : str
+            Charging scenario
+        simulation_year_p : float or array
+            Fraction of change (0: first anchor, 1: last anchor)
+        days : slice, optional
+            Days of the profiles which are interpolated (by default
+            all days)
+
+        Returns
+        -------
+        profile_yh_cy : array
+            Load profile (365, 24) or (years, 365, 24) for an array
+            of fractions
+        """
+        anchor_nrs, positions, diffs_yh = self._get_scenario(charging_scenario)
+
+        stacked_yh = self.stacked_yh
+        if days is not None:
+            stacked_yh = stacked_yh[:, days]
+            diffs_yh = diffs_yh[:, days]
+
+        if np.ndim(simulation_year_p) == 0:
+            if len(anchor_nrs) == 1 or simulation_year_p <= 0:
+                return stacked_yh[anchor_nrs[0]]
+            elif simulation_year_p >= 1:
+                return stacked_yh[anchor_nrs[-1]]
+
+            segment_nr = np.searchsorted(positions, simulation_year_p, side='right') - 1
+            segment_p = (simulation_year_p - positions[segment_nr]) / (
+                positions[segment_nr + 1] - positions[segment_nr])
+
+            return stacked_yh[anchor_nrs[segment_nr]] + diffs_yh[segment_nr] * segment_p
+
+        simulation_year_p = np.asarray(simulation_year_p, dtype=float)
+
+        if len(anchor_nrs) == 1:
+            return np.repeat(
+                stacked_yh[anchor_nrs[:1]], simulation_year_p.shape[0], axis=0)
+
+        segment_nrs = np.clip(
+            np.searchsorted(positions, simulation_year_p, side='right') - 1,
+            0, len(anchor_nrs) - 2)
+        segment_p = (simulation_year_p - positions[segment_nrs]) / (
+            positions[segment_nrs + 1] - positions[segment_nrs])
+
+        profiles_yh_cy = stacked_yh[anchor_nrs[segment_nrs]] + \
+            diffs_yh[segment_nrs] * segment_p[:, np.newaxis, np.newaxis]
+
+        # Use anchor profiles directly to avoid rounding differences
+        profiles_yh_cy[simulation_year_p <= 0] = stacked_yh[anchor_nrs[0]]
+        profiles_yh_cy[simulation_year_p >= 1] = stacked_yh[anchor_nrs[-1]]
+
+        return profiles_yh_cy
+
+class ProfileCache(object):
+    """Bounded least-recently-used cache of blended (365, 24)
+    current year load profiles
+
+    Arguments
+    ----------
+    maxsize : int
+        Maximum number of stored profiles
+
+    Note
+    ====
+    The keys contain the `version` of the base year and end year
+    `LoadProfile`, so assigning a new shape to a load profile
+    invalidates all profiles blended from it. If a shape array is
+    changed in place, the cache needs to be emptied with `clear`.
+
+    The `LoadProfileRegistry` of the last list of load profiles is kept
+    as well, so that a lookup with a list instead of a registry does
+    not stack the load profiles again (see `get_registry`).
+    """
+    def __init__(self, maxsize=128):
+        """Constructor
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._profiles = collections.OrderedDict()
+        self._registry = None
+
+    def __len__(self):
+        return len(self._profiles)
+
+    def get(self, key):
+        """Get a cached profile (None if not cached)
+        """
+        profile_yh = self._profiles.get(key)
+
+        if profile_yh is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self._profiles.move_to_end(key)
+
+        return profile_yh
+
+    def put(self, key, profile_yh):
+        """Store a profile (read-only) and drop the least recently
+        used profile if the cache is full
+        """
+        profile_yh = np.array(profile_yh)
+        profile_yh.flags.writeable = False
+
+        self._profiles[key] = profile_yh
+        self._profiles.move_to_end(key)
+
+        while len(self._profiles) > self.maxsize:
+            self._profiles.popitem(last=False)
+
+    def get_registry(self, load_profiles):
+        """Get the `LoadProfileRegistry` of load profiles
+
+        The registry of the previous call is reused if it contains the
+        same load profile objects (in the same order).
+        """
+        if isinstance(load_profiles, LoadProfileRegistry):
+            return load_profiles
+
+        load_profiles = list(load_profiles)
+        if self._registry is None or len(load_profiles) != len(self._registry.load_profiles) or any(
+                load_profile is not registry_load_profile for load_profile, registry_load_profile in zip(
+                    load_profiles, self._registry.load_profiles)):
+            self._registry = LoadProfileRegistry(load_profiles)
+
+        return self._registry
+
+    def clear(self):
+        """Remove all cached profiles
+        """
+        self._profiles.clear()
+        self._registry = None
+
+class RegionIndex(object):
+    """Position of every region name in an ordering of regions
+
+    Arrays of all regions are ordered as `regions`. Arrays in a different
+    ordering or of a subset of regions (e.g. of the transport model) are
+    converted with a single gather (`reindex`). The gather positions are
+    calculated once for every target ordering and then reused.
+
+    Arguments
+    ----------
+    regions : list
+        Region names in the order of the arrays
+    """
+    def __init__(self, regions):
+        """Constructor
+        """
+        self.regions = tuple(regions)
+        self.positions = {region: region_nr for region_nr, region in enumerate(self.regions)}
+
+        if len(self.positions) != len(self.regions):
+            sys.exit("Error: Region names are not unique")
+
+        self._hash = hash(self.regions)
+        self._reindexers = {}
+
+    def __len__(self):
+        return len(self.regions)
+
+    def __iter__(self):
+        return iter(self.regions)
+
+    def __getitem__(self, region_nr):
+        return self.regions[region_nr]
+
+    def __contains__(self, region):
+        return region in self.positions
+
+    def __eq__(self, other):
+        if not isinstance(other, RegionIndex):
+            return NotImplemented
+        return self is other or (self._hash == other._hash and self.regions == other.regions)
+
+    def __hash__(self):
+        return self._hash
+
+    def get_positions(self, regions):
+        """Get the positions of region names
+
+        Arguments
+        ----------
+        regions : list
+            Region names
+
+        Returns
+        -------
+        region_nrs : numpy.ndarray
+            Position of every region in this ordering
+        """
+        try:
+            return np.array([self.positions[region] for region in regions], dtype=np.intp)
+        except KeyError as error:
+            sys.exit("Error: Region {} is not in the region index".format(error))
+
+    def get_reindexer(self, target):
+        """Get the gather positions to convert arrays in this ordering
+        into the ordering of `target`
+
+        Arguments
+        ----------
+        target : list or RegionIndex
+            Region names of the converted arrays (same regions in a
+            different order or a subset)
+
+        Returns
+        -------
+        region_nrs : numpy.ndarray
+            Read-only position of every region of `target` in this
+            ordering, i.e. `array[region_nrs]` is ordered as `target`
+        """
+        target = get_region_index(target)
+
+        region_nrs = self._reindexers.get(target)
+
+        if region_nrs is None:
+            region_nrs = self.get_positions(target.regions)
+            region_nrs.flags.writeable = False
+            self._reindexers[target] = region_nrs
+
+        return region_nrs
+
+    def reindex(self, array, target, axis=0, out=None):
+        """Convert an array in this ordering into the ordering of `target`
+
+        Arguments
+        ----------
+        array : numpy.ndarray
+            Array with regions ordered as this index along `axis`
+        target : list or RegionIndex
+            Region names of the converted array
+        axis : int
+            Region axis of `array`
+        out : numpy.ndarray, optional
+            Array the converted array is written into
+
+        Returns
+        -------
+        array_target : numpy.ndarray
+            Array with regions ordered as `target` along `axis`
+        """
+        return np.take(array, self.get_reindexer(target), axis=axis, out=out)
+
+class RegionFingerprints(object):
+    """Fingerprints of the inputs of every region of the previous call
+    to recalculate only regions whose inputs changed
+
+    The output array of the previous call is kept, as the rows of
+    unchanged regions are not rewritten. If the array is changed
+    elsewhere, the fingerprints need to be emptied with `clear`.
+
+    E.g. in the iterations of a coupled model run:
+
+        fingerprints = RegionFingerprints()
+        for iteration in range(nr_of_iterations):
+            et_demand_yh = load_curve_assignement(
+                ..., et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints)
+    """
+    def __init__(self):
+        """Constructor
+        """
+        self.fingerprints = None
+        self.shared = None
+        self.out = None
+        self.nr_of_dirty = 0
+
+    def get_out(self, shape, dtype):
+        """Get the output array of the previous call (or a new array
+        if shape or data type differ)
+        """
+        if self.out is not None and self.out.shape == shape and self.out.dtype == dtype:
+            return self.out
+
+        return np.zeros(shape, dtype=dtype)
+
+    def update(self, fingerprints, out, shared=None):
+        """Store new fingerprints and get the regions whose inputs changed
+
+        Arguments
+        ----------
+        fingerprints : array
+            Fingerprint of the inputs of every region (see `get_fingerprints`)
+        out : array
+            Output array the changed regions are written into
+        shared : array or dict, optional
+            Input of all regions (e.g. load profile) or inputs of all
+            regions by name. If one of them changed (or an input is
+            added or removed), all regions are recalculated
+
+        Returns
+        -------
+        dirty : array
+            Whether the inputs of a region changed (bool, same shape
+            as `fingerprints`)
+        """
+        if shared is not None and not isinstance(shared, dict):
+            shared = {None: shared}
+
+        if (self.fingerprints is None or
+                self.out is not out or
+                self.fingerprints.shape != fingerprints.shape or
+                (shared is not None and not self._is_shared_equal(shared))):
+            dirty = np.ones(fingerprints.shape, dtype=bool)
+        else:
+            dirty = fingerprints != self.fingerprints
+
+        self.fingerprints = fingerprints
+        self.shared = None if shared is None else {
+            name: np.array(values) for name, values in shared.items()}
+        self.out = out
+        self.nr_of_dirty = int(np.count_nonzero(dirty))
+
+        return dirty
+
+    def _is_shared_equal(self, shared):
+        """Whether the inputs of all regions are the same as in the
+        previous call
+        """
+        return (
+            self.shared is not None and
+            self.shared.keys() == shared.keys() and
+            all(np.array_equal(self.shared[name], values) for name, values in shared.items()))
+
+    def clear(self):
+        """Remove the fingerprints, so that all regions are recalculated
+        """
+        self.fingerprints = None
+        self.shared = None
+        self.out = None
+
+class ProfileAssignment(object):
+    """Assignment of every region to a load profile (or a weighted
+    mixture of load profiles) of a library of load profiles
+
+    The weights are stored as sparse (regions, profiles) matrix in
+    compressed sparse row format, so that the hourly demand of all
+    regions is one sparse-dense matrix product of the weights and the
+    (profiles, 8760) current year profiles. scipy.sparse is used if it
+    is installed.
+
+    Arguments
+    ----------
+    regions : list or RegionIndex
+        All region names (in the order of the regions of
+        `load_curve_assignement`)
+    profile_names : list
+        Charging scenarios of the load profile registry which form the
+        library of load profiles (e.g. ['urban', 'rural'])
+    assignment : dict, array or scipy.sparse matrix
+        Load profile of every region
+
+            dict :      {region: profile_name} or
+                        {region: {profile_name: weight}}
+
+            array :     Weights of shape (regions, profiles)
+
+        The weights of every region are normalized to a sum of 1
+    """
+    def __init__(self, regions, profile_names, assignment):
+        """Constructor
+        """
+        self.regions = get_region_index(regions)
+        self.profile_names = list(profile_names)
+
+        if isinstance(assignment, dict):
+            profile_nrs = {profile_name: profile_nr for profile_nr, profile_name in enumerate(self.profile_names)}
+
+            region_nrs, profile_nrs_assigned, weights = [], [], []
+            for region, profile_weights in assignment.items():
+                if not isinstance(profile_weights, dict):
+                    profile_weights = {profile_weights: 1.0}
+
+                for profile_name, weight in profile_weights.items():
+                    if profile_name not in profile_nrs:
+                        sys.exit("Error: Load profile {} is not in the profile library".format(profile_name))
+
+                    region_nrs.append(region)
+                    profile_nrs_assigned.append(profile_nrs[profile_name])
+                    weights.append(weight)
+
+            region_nrs = self.regions.get_positions(region_nrs)
+            profile_nrs_assigned = np.array(profile_nrs_assigned, dtype=np.intp)
+            weights = np.array(weights, dtype=float)
+
+        elif scipy is not None and scipy.sparse.issparse(assignment):
+            assignment = scipy.sparse.coo_matrix(assignment)
+            region_nrs, profile_nrs_assigned, weights = assignment.row, assignment.col, assignment.data
+
+        else:
+            assignment = np.asarray(assignment, dtype=float)
+            region_nrs, profile_nrs_assigned = np.nonzero(assignment)
+            weights = assignment[region_nrs, profile_nrs_assigned]
+
+        assert getattr(assignment, 'shape', (len(self.regions), len(self.profile_names))) == (
+            len(self.regions), len(self.profile_names))
+
+        # Compressed sparse row format with weights normalized per region
+        order = np.lexsort((profile_nrs_assigned, region_nrs))
+        region_nrs = np.asarray(region_nrs, dtype=np.intp)[order]
+
+        weight_sums = np.bincount(region_nrs, weights=weights[order], minlength=len(self.regions))
+        if np.any(weight_sums <= 0):
+            sys.exit("Error: Regions {} have no load profile".format(
+                [self.regions[region_nr] for region_nr in np.flatnonzero(weight_sums <= 0)]))
+
+        self.indptr = np.zeros((len(self.regions) + 1), dtype=np.intp)
+        np.cumsum(np.bincount(region_nrs, minlength=len(self.regions)), out=self.indptr[1:])
+        self.indices = np.asarray(profile_nrs_assigned, dtype=np.intp)[order]
+        self.weights = weights[order] / weight_sums[region_nrs]
+
+        self._matrix = None
+
+    @property
+    def matrix(self):
+        """Weights as scipy.sparse CSR matrix (regions, profiles), None
+        if scipy is not installed
+        """
+        if self._matrix is None and scipy is not None:
+            self._matrix = scipy.sparse.csr_matrix(
+                (self.weights, self.indices, self.indptr),
+                shape=(len(self.regions), len(self.profile_names)))
+
+        return self._matrix
+
+    def to_array(self):
+        """Weights as dense array (regions, profiles)
+        """
+        weights = np.zeros((len(self.regions), len(self.profile_names)))
+        region_nrs = np.repeat(np.arange(len(self.regions)), np.diff(self.indptr))
+        np.add.at(weights, (region_nrs, self.indices), self.weights)
+
+        return weights
+
+    def dot(self, profiles_yh, scale=None, region_nrs=None, out=None):
+        """Multiply the weights with the load profiles of the library
+
+        Arguments
+        ----------
+        profiles_yh : numpy.ndarray
+            Load profile of every profile of the library (profiles, hours)
+        scale : numpy.ndarray, optional
+            Factor of every (selected) region, e.g. annual demand
+        region_nrs : numpy.ndarray, optional
+            Position of the selected regions (by default all regions)
+        out : numpy.ndarray, optional
+            Array of shape (regions, hours) the result is written into
+
+        Returns
+        -------
+        values_yh : numpy.ndarray
+            Weighted mixture of the load profiles of every (selected)
+            region times `scale`, shape (regions, hours)
+        """
+        if region_nrs is None:
+            region_nrs = np.arange(len(self.regions))
+        region_nrs = np.asarray(region_nrs, dtype=np.intp)
+
+        if scale is None:
+            scale = np.ones(region_nrs.shape)
+        scale = np.asarray(scale, dtype=float)
+
+        if out is None:
+            out = np.empty((region_nrs.size, profiles_yh.shape[1]), dtype=profiles_yh.dtype)
+
+        if self.matrix is not None:
+            matrix = self.matrix[region_nrs].multiply(scale[:, np.newaxis])
+            out[...] = scipy.sparse.csr_matrix(matrix) @ profiles_yh
+            return out
+
+        # Without scipy: add the profiles of the n-th assigned profile of all regions at once
+        nr_of_profiles = self.indptr[region_nrs + 1] - self.indptr[region_nrs]
+
+        # Every region has at least one profile
+        positions = self.indptr[region_nrs]
+        np.multiply(
+            (self.weights[positions] * scale)[:, np.newaxis],
+            profiles_yh[self.indices[positions]],
+            out=out)
+
+        for profile_slot in range(1, np.max(nr_of_profiles, initial=0)):
+            slot_region_nrs = np.flatnonzero(nr_of_profiles > profile_slot)
+            positions = self.indptr[region_nrs[slot_region_nrs]] + profile_slot
+
+            out[slot_region_nrs] += (
+                self.weights[positions] * scale[slot_region_nrs])[:, np.newaxis] * profiles_yh[self.indices[positions]]
+
+        return out
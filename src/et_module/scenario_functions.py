@@ -0,0 +1,167 @@
+"""Functions to run several scenarios in parallel
+"""
+import itertools
+import concurrent.futures
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+
+from et_module import main_functions
+
+# Shared inputs and output of a worker process (set by `_init_worker`)
+_worker_state = {}
+
+def run_scenarios(
+        charging_scenarios,
+        diffusions,
+        curr_yrs,
+        base_yr,
+        yr_until_changed,
+        et_service_demand_yh,
+        load_profiles,
+        regions,
+        max_workers=None,
+        dtype=float
+    ):
+    """Run `load_curve_assignement` for every combination of charging
+    scenario, diffusion and year on a pool of processes
+
+    The stacked load profiles, the annual demand of every region and the
+    output array are stored in shared memory. Worker processes attach to
+    them once when they start and write their results directly into the
+    output array, so no large array is pickled between processes.
+
+    Arguments
+    =========
+    charging_scenarios : list
+        Charging scenarios (e.g. ['unsheduled', 'sheduled'])
+    diffusions : list
+        Types of diffusion (e.g. ['linear', 'sigmoid'])
+    curr_yrs : list
+        Simulation years
+    base_yr : int
+        Base year of simulation
+    yr_until_changed : int
+        Year until changed is fully implemented
+    et_service_demand_yh : dict, array or pandas.DataFrame
+        Transport energy demand for every region (hourly demand),
+        see `main_functions.get_service_demand_y`
+    load_profiles : list or LoadProfileRegistry
+        Load profile objects
+    regions : list or RegionIndex
+        All region names
+    max_workers : int, optional
+        Number of processes (default: number of cores)
+    dtype : dtype
+        Data type of the hourly demand
+
+    Returns
+    =======
+    et_demand_yh : pandas.DataFrame
+        Hourly demand with a (charging_scenario, diffusion, year, region)
+        index and a column for every hour
+    """
+    load_profile_registry = main_functions.get_load_profile_registry(load_profiles)
+
+    scenarios = list(itertools.product(charging_scenarios, diffusions, curr_yrs))
+    nr_of_hours = load_profile_registry.stacked_yh[0].size
+
+    # Only the annual demand is needed to disaggregate
+    et_service_demand_y = main_functions.get_service_demand_y(
+        et_service_demand_yh, regions)
+
+    shared_arrays = {}
+    try:
+        for array_name, shape, array_dtype, values in [
+                ('stacked_yh', load_profile_registry.stacked_yh.shape, float, load_profile_registry.stacked_yh),
+                ('et_service_demand_y', et_service_demand_y.shape, float, et_service_demand_y),
+                ('et_demand_yh', (len(scenarios), len(regions), nr_of_hours), dtype, None)]:
+            shared_arrays[array_name] = _create_shared_array(shape, array_dtype, values)
+
+        shared_array_specs = {
+            array_name: (shm.name, array.shape, array.dtype.str)
+            for array_name, (shm, array) in shared_arrays.items()}
+
+        load_profile_specs = [
+            (load_profile.name, load_profile.year)
+            for load_profile in load_profile_registry.load_profiles]
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers,
+                initializer=_init_worker,
+                initargs=(
+                    shared_array_specs,
+                    load_profile_specs,
+                    load_profile_registry.scenario_profiles)) as executor:
+
+            list(executor.map(
+                _run_scenario,
+                [(scenario_nr, ) + scenario + (base_yr, yr_until_changed)
+                 for scenario_nr, scenario in enumerate(scenarios)]))
+
+        et_demand_yh = np.array(shared_arrays['et_demand_yh'][1])
+    finally:
+        for shm, _ in shared_arrays.values():
+            shm.close()
+            shm.unlink()
+
+    index = pd.MultiIndex.from_tuples(
+        [scenario + (region, ) for scenario in scenarios for region in regions],
+        names=['charging_scenario', 'diffusion', 'year', 'region'])
+
+    return pd.DataFrame(
+        et_demand_yh.reshape(len(index), nr_of_hours), index=index, copy=False)
+
+def _create_shared_array(shape, dtype, values=None):
+    """Create an array in shared memory
+    """
+    dtype = np.dtype(dtype)
+    shm = shared_memory.SharedMemory(
+        create=True, size=max(int(np.prod(shape)) * dtype.itemsize, 1))
+    array = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+
+    if values is not None:
+        array[:] = values
+
+    return shm, array
+
+def _init_worker(shared_array_specs, load_profile_specs, scenario_profiles):
+    """Attach a worker process to the shared arrays
+    """
+    for array_name, (shm_name, shape, dtype) in shared_array_specs.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        _worker_state[array_name] = (shm, np.ndarray(shape, dtype=dtype, buffer=shm.buf))
+
+    stacked_yh = _worker_state['stacked_yh'][1]
+
+    load_profiles = [
+        main_functions.LoadProfile(
+            name=name,
+            year=year,
+            shape_yd=np.sum(stacked_yh[load_profile_nr], axis=1),
+            shape_yh=stacked_yh[load_profile_nr])
+        for load_profile_nr, (name, year) in enumerate(load_profile_specs)]
+
+    _worker_state['load_profile_registry'] = main_functions.LoadProfileRegistry(
+        load_profiles, scenario_profiles=scenario_profiles)
+
+def _run_scenario(args):
+    """Calculate the hourly demand of one scenario and write it into
+    the shared output array
+    """
+    scenario_nr, charging_scenario, diffusion, curr_yr, base_yr, yr_until_changed = args
+
+    profile_yh_cy = main_functions.get_profile_yh_cy(
+        curr_yr=curr_yr,
+        base_yr=base_yr,
+        yr_until_changed=yr_until_changed,
+        load_profiles=_worker_state['load_profile_registry'],
+        charging_scenario=charging_scenario,
+        diffusion=diffusion)
+
+    np.multiply(
+        _worker_state['et_service_demand_y'][1][:, np.newaxis],
+        profile_yh_cy.reshape(1, -1),
+        out=_worker_state['et_demand_yh'][1][scenario_nr])
+
+    return scenario_nr
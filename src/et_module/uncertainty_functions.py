@@ -0,0 +1,215 @@
+"""Functions to propagate the uncertainty of assumptions with Monte Carlo
+sampling
+"""
+import sys
+import numpy as np
+import pandas as pd
+
+from et_module import main_functions
+from et_module.main import main
+
+# Default quantiles of the summaries
+QUANTILES = (0.05, 0.5, 0.95)
+
+# Uncertain assumptions and their constant values without distribution
+ASSUMPTIONS = {
+    'av_usable_battery_capacity': 30.0,     # [kwh] Average (storage) capacity of EV
+    'nr_ev_per_trip': 1,                    # [-] Number of EVs per trip
+    'yr_until_changed': None,               # Year until changed is fully implemented (argument)
+    'sig_midpoint': 0,                      # Mid point of sigmoid diffusion
+    'sig_steeppness': 1}                    # Steepness of sigmoid diffusion
+
+def run_uncertainty(
+        curr_yr,
+        base_yr,
+        yr_until_changed,
+        et_service_demand_yh,
+        load_profiles,
+        regions,
+        charging_scenario,
+        reg_trips_ev_24h,
+        reg_elec_24h,
+        distributions,
+        nr_of_samples=1000,
+        quantiles=QUANTILES,
+        diffusion='linear',
+        seed=None,
+        chunk_size=10**6,
+        dtype=float
+    ):
+    """Calculate quantiles of the battery capacity and hourly demand of
+    every region for samples of uncertain assumptions
+
+    The samples are evaluated in batched calls (`main` with sample
+    arrays of the assumptions and one blending of the load profiles of
+    all samples). The quantiles need all samples of a value at once, so
+    the battery capacity is calculated in blocks of regions and the load
+    profiles in blocks of days, each for all samples. Every block holds
+    at most `chunk_size` sample values, i.e. memory is bounded by
+    `chunk_size` instead of `nr_of_samples` times the number of regions
+    or hours. A block holds at least one region or day, so with more
+    than `chunk_size / 24` samples, the limit is exceeded.
+
+    The annual demand of a region is not uncertain, so the quantiles of
+    the hourly demand of a region are its annual demand times the
+    quantiles of the current year load profile over all samples. Only
+    the profiles of the samples are blended instead of the hourly demand
+    of every sample and region.
+
+    Arguments
+    =========
+    curr_yr : int
+        Current simulation year
+    base_yr : int
+        Base year of simulation
+    yr_until_changed : int
+        Year until changed is fully implemented (if not sampled)
+    et_service_demand_yh : dict, array or pandas.DataFrame
+        Transport energy demand for every region (hourly demand),
+        see `main_functions.get_service_demand_y`
+    load_profiles : list or LoadProfileRegistry
+        Load profile objects
+    regions : list or RegionIndex
+        All region names
+    charging_scenario : str
+        Charging scenario (e.g. 'sheduled')
+    reg_trips_ev_24h : numpy.ndarray
+        Number of trips started in every region and hour (regions, 24)
+    reg_elec_24h : numpy.ndarray
+        Electricity demand of EVs in every region and hour (regions, 24)
+    distributions : dict
+        Distribution of every uncertain assumption as tuple of the name
+        of a method of `numpy.random.Generator` and its parameters, e.g.
+
+            {
+                'av_usable_battery_capacity': ('normal', 30, 5),
+                'nr_ev_per_trip': ('uniform', 1, 1.5),
+                'yr_until_changed': ('integers', 2040, 2060),
+                'sig_steeppness': ('triangular', 0.5, 1, 2)}
+
+        Assumptions without distribution are constant (see `ASSUMPTIONS`)
+    nr_of_samples : int
+        Number of samples
+    quantiles : list
+        Quantiles of the summaries
+    diffusion : str
+        Type of diffusion ('linear' or 'sigmoid')
+    seed : int, optional
+        Seed of the random number generator
+    chunk_size : int
+        Maximum number of sample values (samples times regions or
+        samples times hours) evaluated at once
+    dtype : dtype
+        Data type of the samples of the battery capacity and load profiles
+
+    Returns
+    =======
+    battery_capacity_quantiles : pandas.DataFrame
+        Quantiles of the total battery capacity with regions as index
+        and quantiles as columns
+    et_demand_yh_quantiles : FactorizedLoadCurve
+        Quantiles of the hourly demand of every region, shape
+        (quantiles, regions, 8760) (calculated on demand)
+    """
+    samples = draw_samples(
+        distributions,
+        nr_of_samples,
+        np.random.default_rng(seed),
+        yr_until_changed=yr_until_changed)
+
+    load_profile_registry = main_functions.get_load_profile_registry(load_profiles)
+    nr_of_days = load_profile_registry.stacked_yh.shape[1]
+
+    regions = list(regions)
+    et_service_demand_y = main_functions.get_service_demand_y(et_service_demand_yh, regions)
+
+    # --------------------------------------
+    # Battery capacity of all samples of a block of regions (samples, regions)
+    # --------------------------------------
+    battery_capacity_quantiles = np.empty((len(quantiles), len(regions)))
+    regions_chunk_size = max(1, chunk_size // nr_of_samples)
+
+    for region_nr_start in range(0, len(regions), regions_chunk_size):
+        region_nrs = slice(region_nr_start, region_nr_start + regions_chunk_size)
+
+        battery_capacity_samples = main(
+            regions[region_nrs],
+            curr_yr,
+            reg_trips_ev_24h[region_nrs],
+            reg_elec_24h[region_nrs],
+            dtype=dtype,
+            assumption_av_usable_battery_capacity=samples['av_usable_battery_capacity'][:, np.newaxis],
+            assumption_nr_ev_per_trip=samples['nr_ev_per_trip'][:, np.newaxis])
+
+        battery_capacity_quantiles[:, region_nrs] = np.quantile(
+            battery_capacity_samples, quantiles, axis=0)
+
+    battery_capacity_quantiles = pd.DataFrame(
+        battery_capacity_quantiles.T,
+        index=regions,
+        columns=list(quantiles))
+
+    # --------------------------------------
+    # Current year load profile of all samples of a block of days (samples, days, 24)
+    # --------------------------------------
+    simulation_yrs_p = np.array(main_functions.calc_diffusion_p(
+        curr_yr=curr_yr,
+        base_yr=base_yr,
+        yr_until_changed=samples['yr_until_changed'],
+        diffusion=diffusion,
+        sig_midpoint=samples['sig_midpoint'],
+        sig_steeppness=samples['sig_steeppness']), dtype=float, ndmin=1)
+
+    profile_yh_quantiles = np.empty((len(quantiles), nr_of_days, 24))
+    days_chunk_size = max(1, chunk_size // (nr_of_samples * 24))
+
+    for day_start in range(0, nr_of_days, days_chunk_size):
+        days = slice(day_start, day_start + days_chunk_size)
+
+        profile_yh_samples = load_profile_registry.blend(
+            charging_scenario, simulation_yrs_p, days=days).astype(dtype, copy=False)
+
+        profile_yh_quantiles[:, days] = np.quantile(profile_yh_samples, quantiles, axis=0)
+
+    et_demand_yh_quantiles = main_functions.FactorizedLoadCurve(
+        et_service_demand_y,
+        profile_yh_quantiles,
+        dtype=dtype)
+
+    return battery_capacity_quantiles, et_demand_yh_quantiles
+
+def draw_samples(distributions, nr_of_samples, rng, yr_until_changed=None):
+    """Draw samples of all assumptions
+
+    Arguments
+    =========
+    distributions : dict
+        Distribution of every uncertain assumption (see `run_uncertainty`)
+    nr_of_samples : int
+        Number of samples
+    rng : numpy.random.Generator
+        Random number generator
+    yr_until_changed : int, optional
+        Constant year until changed is fully implemented
+
+    Returns
+    =======
+    samples : dict
+        Samples (array of `nr_of_samples`) of every assumption
+    """
+    for assumption in distributions:
+        if assumption not in ASSUMPTIONS:
+            sys.exit("Error: No uncertain assumption {}".format(assumption))
+
+    samples = {}
+    for assumption, value in ASSUMPTIONS.items():
+        if assumption in distributions:
+            distribution, *parameters = distributions[assumption]
+            samples[assumption] = np.asarray(
+                getattr(rng, distribution)(*parameters, size=nr_of_samples))
+        else:
+            if assumption == 'yr_until_changed':
+                value = yr_until_changed
+            samples[assumption] = np.full((nr_of_samples), value)
+
+    return samples
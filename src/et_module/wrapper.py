@@ -0,0 +1,232 @@
+"""The sector model wrapper for smif to run the energy transport model
+
+The wrapper keeps its state between the timesteps of a model run: the
+load profiles are read once in `before_model_run` and the output arrays
+are allocated once and reused by every call of `simulate`, so a timestep
+only costs the actual calculation. Within and across timesteps, only
+regions whose inputs changed since the previous call are recalculated
+(see `main_functions.RegionFingerprints`).
+
+smif is optional. If it is not installed, `ETWrapper` derives from a
+minimal stand-in of `SectorModel` and can be run with `LocalDataHandle`.
+"""
+import numpy as np
+
+from et_module import main_functions
+from et_module.main import main, v2g_g2v_capacity
+
+try:
+    from smif.model.sector_model import SectorModel
+except ImportError:
+    class SectorModel(object):
+        """Minimal stand-in of the smif `SectorModel` if smif is not installed
+        """
+        def __init__(self, name):
+            self.name = name
+
+class ETWrapper(SectorModel):
+    """Energy transport model wrapper for smif
+
+    Parameters
+    ----------
+    path_load_profiles : str
+        Path to the folder with the load profile csv files
+    yr_until_changed : int
+        Year until changed is fully implemented
+    charging_scenario : str
+        Charging scenario (e.g. 'sheduled')
+    diffusion : str
+        Type of diffusion ('linear' or 'sigmoid')
+
+    Inputs
+    ------
+    et_service_demand_yh : (regions, 8760)
+        Transport energy demand of every region and hour
+    reg_trips_ev_24h : (regions, 24)
+        Number of trips started in every region and hour
+    reg_elec_24h : (regions, 24)
+        Electricity demand of EVs in every region and hour (kWh)
+
+    Outputs
+    -------
+    et_demand_yh : (regions, 8760)
+        Hourly electricity demand of every region
+    total_battery_capacity : (regions)
+        Total EV battery capacity of every region (kWh)
+    v2g_capacity : (regions)
+        V2G capacity of every region in the peak hour (kWh)
+    g2v_capacity : (regions)
+        G2V capacity of every region in the peak hour (kWh)
+    """
+    def __init__(self, name='et_module', dtype=float):
+        """Constructor
+        """
+        super(ETWrapper, self).__init__(name)
+        self.dtype = dtype
+
+        self.regions = None
+        self.load_profile_registry = None
+        self.profile_cache = None
+        self.outputs_buffer = None
+        self.fingerprints = None
+
+    def before_model_run(self, data_handle):
+        """Read the load profiles and allocate the output arrays once
+        before the first timestep
+        """
+        self.regions = main_functions.RegionIndex(data_handle.get_region_names())
+
+        path_load_profiles = _get_value(data_handle.get_parameter('path_load_profiles'))
+
+        self.load_profile_registry = main_functions.LoadProfileRegistry(
+            main_functions.get_load_profiles(str(path_load_profiles), dtype=self.dtype))
+        self.profile_cache = main_functions.ProfileCache()
+
+        nr_of_hours = self.load_profile_registry.stacked_yh[0].size
+
+        self.outputs_buffer = {
+            'et_demand_yh': np.zeros((len(self.regions), nr_of_hours), dtype=self.dtype),
+            'total_battery_capacity': np.zeros((len(self.regions)), dtype=self.dtype)}
+
+        self.fingerprints = {
+            output_name: main_functions.RegionFingerprints()
+            for output_name in self.outputs_buffer}
+
+    def simulate(self, data_handle):
+        """Run the model for the current timestep of `data_handle`
+
+        The outputs are written into the arrays allocated in
+        `before_model_run`, i.e. the results of the previous timestep
+        are overwritten after `set_results` has stored them.
+        """
+        if self.outputs_buffer is None:
+            self.before_model_run(data_handle)
+
+        curr_yr = data_handle.current_timestep
+
+        reg_trips_ev_24h = self._get_input(data_handle, 'reg_trips_ev_24h')
+        reg_elec_24h = self._get_input(data_handle, 'reg_elec_24h')
+
+        main_functions.load_curve_assignement(
+            curr_yr=curr_yr,
+            base_yr=data_handle.base_timestep,
+            yr_until_changed=int(_get_value(data_handle.get_parameter('yr_until_changed'))),
+            et_service_demand_yh=self._get_input(data_handle, 'et_service_demand_yh'),
+            load_profiles=self.load_profile_registry,
+            regions=self.regions,
+            charging_scenario=str(_get_value(data_handle.get_parameter('charging_scenario'))),
+            diffusion=str(_get_value(data_handle.get_parameter('diffusion'))),
+            profile_cache=self.profile_cache,
+            out=self.outputs_buffer['et_demand_yh'],
+            fingerprints=self.fingerprints['et_demand_yh'])
+
+        main(
+            self.regions,
+            curr_yr,
+            reg_trips_ev_24h,
+            reg_elec_24h,
+            out=self.outputs_buffer['total_battery_capacity'],
+            fingerprints=self.fingerprints['total_battery_capacity'])
+
+        v2g_capacity, g2v_capacity = v2g_g2v_capacity(
+            reg_trips_ev_24h, reg_elec_24h, dtype=self.dtype)
+
+        data_handle.set_results('et_demand_yh', self.outputs_buffer['et_demand_yh'])
+        data_handle.set_results('total_battery_capacity', self.outputs_buffer['total_battery_capacity'])
+        data_handle.set_results('v2g_capacity', v2g_capacity)
+        data_handle.set_results('g2v_capacity', g2v_capacity)
+
+    def _get_input(self, data_handle, input_name):
+        """Get an input as array ordered as `self.regions`
+
+        Inputs given as dict or DataFrame (region names as keys or index)
+        are ordered with a single gather. The gather positions are
+        calculated once for every ordering of the keys or index.
+        """
+        data = data_handle.get_data(input_name)
+
+        if isinstance(data, dict):
+            assert len(data) == len(self.regions)
+
+            return main_functions.get_region_index(data.keys()).reindex(
+                np.asarray(list(data.values())), self.regions)
+        elif hasattr(data, 'loc'):
+            return main_functions.get_region_index(data.index).reindex(
+                data.to_numpy(), self.regions)
+        else:
+            return np.asarray(_get_value(data))
+
+class LocalDataHandle(object):
+    """Stand-in of the smif data handle to run `ETWrapper` without smif
+
+    Arguments
+    ----------
+    regions : list
+        Region names
+    parameters : dict
+        Model parameters by name
+    data : dict
+        Inputs by name. Values are either the same for all timesteps or
+        a dict with the inputs of every timestep
+    timesteps : list
+        Timesteps of the model run (the first is the base timestep)
+    """
+    def __init__(self, regions, parameters, data, timesteps):
+        """Constructor
+        """
+        self.regions = regions
+        self.parameters = parameters
+        self.data = data
+        self.timesteps = list(timesteps)
+        self.base_timestep = self.timesteps[0]
+        self.current_timestep = self.timesteps[0]
+        self.results = {}
+
+    def get_region_names(self):
+        """Get all region names
+        """
+        return self.regions
+
+    def get_parameter(self, parameter_name):
+        """Get a model parameter
+        """
+        return self.parameters[parameter_name]
+
+    def get_data(self, input_name, timestep=None):
+        """Get an input of the current (or given) timestep
+        """
+        if timestep is None:
+            timestep = self.current_timestep
+
+        data = self.data[input_name]
+        if isinstance(data, dict) and timestep in data:
+            return data[timestep]
+        return data
+
+    def set_results(self, output_name, data):
+        """Store a copy of an output of the current timestep
+        """
+        self.results[(output_name, self.current_timestep)] = np.array(data)
+
+    def get_results(self, output_name, timestep=None):
+        """Get a stored output of the current (or given) timestep
+        """
+        if timestep is None:
+            timestep = self.current_timestep
+
+        return self.results[(output_name, timestep)]
+
+    def run(self, model):
+        """Run `model` for all timesteps
+        """
+        model.before_model_run(self)
+        for timestep in self.timesteps:
+            self.current_timestep = timestep
+            model.simulate(self)
+
+def _get_value(data):
+    """Get the values of smif data arrays (or the data itself)
+    """
+    if hasattr(data, 'as_ndarray'):
+        return data.as_ndarray()
+    return data
@@ -1,11 +1,38 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 """
-    Dummy conftest.py for et_module.
+    Shared fixtures for the et_module tests.
 
-    If you don't know what this is for, just leave it empty.
     Read more about conftest.py under:
     https://pytest.org/latest/plugins.html
 """
+import numpy as np
+import pytest
+from et_module import main_functions
 
-# import pytest
+@pytest.fixture
+def load_profiles():
+    """Base year (flat) and end year (rising over the day) load profile
+    """
+    return [
+        main_functions.LoadProfile(
+            name=name,
+            year=int(name[-8:-4]),
+            shape_yd=np.full((365), 1/365),
+            shape_dh=shape_dh)
+        for name, shape_dh in [
+            ('av_lp_2015.csv', np.full((24), 1/24)),
+            ('av_lp_2050.csv', np.arange(24) / np.sum(np.arange(24)))]]
+
+@pytest.fixture
+def path_load_profiles(tmp_path):
+    """Folder with base year and end year load profile csv files
+    (percentages of every hour of the day, reversed in the end year)
+    """
+    hourly_percentages = np.arange(1, 25) / np.sum(np.arange(1, 25)) * 100
+    for name in ['av_lp_2015.csv', 'av_lp_2050.csv']:
+        with open(str(tmp_path / name), 'w') as csvfile:
+            csvfile.write(",".join(str(hour) for hour in range(24)) + "\n")
+            csvfile.write(",".join(str(value) for value in hourly_percentages[::-1 if '2050' in name else 1]) + "\n")
+
+    return tmp_path
@@ -0,0 +1,135 @@
+import numpy as np
+from et_module import main_functions
+from et_module.charging_functions import SmartChargingScheduler, valley_filling
+
+def test_valley_filling():
+    """
+    """
+    rng = np.random.RandomState(0)
+    base_load = rng.rand(50, 24) * 10
+    max_power = rng.rand(50, 24) * 2
+    max_power[:, :6] = 0
+    energy = rng.rand(50) * 20
+    energy[0] = 0
+    energy[1] = 100
+
+    charging = valley_filling(base_load, energy, max_power)
+
+    assert np.all(charging >= 0) and np.all(charging <= max_power)
+    np.testing.assert_allclose(charging.sum(axis=1), np.minimum(energy, max_power.sum(axis=1)))
+
+    # Reference level found by bisection
+    for period_nr in range(2, 50):
+        lower, upper = 0, 100
+        for _ in range(100):
+            level = (lower + upper) / 2
+            if np.sum(np.clip(level - base_load[period_nr], 0, max_power[period_nr])) < energy[period_nr]:
+                lower = level
+            else:
+                upper = level
+        np.testing.assert_allclose(
+            charging[period_nr], np.clip(level - base_load[period_nr], 0, max_power[period_nr]), atol=1e-9)
+
+def test_smart_charging_scheduler():
+    """
+    """
+    et_demand_yh = np.full((2, 8760), 1.0)
+    base_load_yh = np.tile(np.arange(24, dtype=float), 365)
+    availability_24h = np.zeros((24), dtype=bool)
+    availability_24h[[0, 1, 2, 3, 4, 5, 18, 19, 20, 21, 22, 23]] = True
+
+    scheduler = SmartChargingScheduler(
+        base_load_yh=base_load_yh,
+        max_charging_power=[10, 5],
+        charging_availability_24h=availability_24h,
+        window_start_hour=18)
+
+    actual = scheduler.schedule(et_demand_yh)
+    actual_dh = actual.reshape(2, 365, 24)
+
+    # Daily energy is charged in the hours with the lowest load (after midnight)
+    np.testing.assert_allclose(actual.sum(axis=1), et_demand_yh.sum(axis=1))
+    np.testing.assert_allclose(actual_dh[0, 1:, 0:6], [[6.5, 5.5, 4.5, 3.5, 2.5, 1.5]] * 364)
+    np.testing.assert_allclose(actual_dh[1, 1:, 0:6], [[5, 5, 5, 4, 3, 2]] * 364)
+    assert not np.any(actual_dh[:, :, 6:18])
+    assert not np.any(scheduler.unmet_energy > 1e-9)
+
+def test_load_curve_assignement_smart_charging(load_profiles):
+    """
+    """
+    kwargs = dict(
+        curr_yr=2030,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=np.random.RandomState(0).rand(3, 8760),
+        load_profiles=load_profiles,
+        regions=['regA', 'regB', 'regC'])
+
+    scheduler = SmartChargingScheduler(base_load_yh=np.tile(np.arange(24, 0, -1), 365))
+
+    sheduled = main_functions.load_curve_assignement(
+        charging_scenario='sheduled', scheduler=scheduler, **kwargs)
+    expected = main_functions.load_curve_assignement(charging_scenario='sheduled', **kwargs)
+
+    np.testing.assert_allclose(sheduled.sum(axis=1), expected.sum(axis=1))
+    assert np.all(np.argmax(sheduled.reshape(3, 365, 24), axis=2) == 23)
+
+    # Only used for the 'sheduled' charging scenario
+    np.testing.assert_array_equal(
+        main_functions.load_curve_assignement(
+            charging_scenario='unsheduled', scheduler=scheduler, **kwargs),
+        main_functions.load_curve_assignement(charging_scenario='unsheduled', **kwargs))
+
+def test_load_curve_assignement_smart_charging_fingerprints(load_profiles):
+    """
+    """
+    et_service_demand_yh = np.random.RandomState(0).rand(3, 8760)
+    kwargs = dict(
+        curr_yr=2030,
+        base_yr=2015,
+        yr_until_changed=2050,
+        load_profiles=load_profiles,
+        regions=['regA', 'regB', 'regC'],
+        charging_scenario='sheduled')
+
+    scheduler = SmartChargingScheduler(
+        base_load_yh=np.tile(np.arange(24, 0, -1, dtype=float), 365),
+        max_charging_power=[1, 0.05, 1])
+    fingerprints = main_functions.RegionFingerprints()
+
+    main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, scheduler=scheduler, **kwargs)
+    assert fingerprints.nr_of_dirty == 3
+
+    # A changed scheduler argument changes all regions
+    scheduler.base_load_yh[::24] = 0
+    actual = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, scheduler=scheduler, **kwargs)
+
+    assert fingerprints.nr_of_dirty == 3
+    np.testing.assert_array_equal(actual, main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, scheduler=scheduler, **kwargs))
+
+    # Turning the scheduler off changes all regions
+    actual = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, **kwargs)
+
+    assert fingerprints.nr_of_dirty == 3
+    np.testing.assert_array_equal(actual, main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, **kwargs))
+
+    # Changed regions only, the unmet energy of all regions is kept
+    main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, scheduler=scheduler, **kwargs)
+    et_service_demand_yh[1] *= 2
+    actual = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, scheduler=scheduler, **kwargs)
+
+    assert fingerprints.nr_of_dirty == 1
+    assert scheduler.unmet_energy.shape == (3, 365)
+    unmet_energy = scheduler.unmet_energy.copy()
+    assert np.any(unmet_energy[1] > 0)
+
+    np.testing.assert_allclose(actual, main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh, scheduler=scheduler, **kwargs))
+    np.testing.assert_allclose(unmet_energy, scheduler.unmet_energy)
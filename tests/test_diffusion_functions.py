@@ -1,3 +1,4 @@
+import numpy as np
 from et_module import diffusion_functions
 
 def test_sigmoid_diffusion():
@@ -104,4 +105,58 @@ def test_linear_diff():
         value_start=0,
         value_end=1,
         yr_until_changed=2015)
-    assert out_value_4 == expected4
\ No newline at end of file
+    assert out_value_4 == expected4
+
+def test_linear_diff_array():
+    """Compare vectorized linear diffusion with scalar version
+    """
+    base_yr = 2015
+    curr_yrs = np.arange(2015, 2051)
+
+    for yr_until_changed in [2014, 2020, 2050]:
+        result = diffusion_functions.linear_diff_array(
+            base_yr=base_yr,
+            curr_yr=curr_yrs,
+            value_start=0,
+            value_end=1,
+            yr_until_changed=yr_until_changed)
+
+        expected = [diffusion_functions.linear_diff(
+            base_yr, curr_yr, 0, 1, yr_until_changed) for curr_yr in curr_yrs]
+
+        np.testing.assert_allclose(result, expected)
+
+    # Zero-length period (scalar version divides by zero)
+    result = diffusion_functions.linear_diff_array(
+        base_yr=2015,
+        curr_yr=[2015, 2020],
+        value_start=0,
+        value_end=1,
+        yr_until_changed=2015)
+    np.testing.assert_array_equal(result, [0, 1])
+
+    # Scalar input returns scalar
+    assert diffusion_functions.linear_diff_array(2015, 2016.5, 1.0, 2.0, 2018) == 1.5
+
+def test_sigmoid_diffusion_array():
+    """Compare vectorized sigmoid diffusion with scalar version
+    """
+    base_yr = 2015
+    curr_yrs = np.arange(2015, 2051)[:, np.newaxis]
+    sig_steeppness = np.array([0.5, 1, 2])
+
+    for end_yr in [2015, 2030, 2050]:
+        result = diffusion_functions.sigmoid_diffusion_array(
+            base_yr=base_yr,
+            curr_yr=curr_yrs,
+            end_yr=end_yr,
+            sig_midpoint=0,
+            sig_steeppness=sig_steeppness)
+
+        assert result.shape == (36, 3)
+
+        for yr_nr, curr_yr in enumerate(curr_yrs[:, 0]):
+            for steepness_nr, steepness in enumerate(sig_steeppness):
+                expected = diffusion_functions.sigmoid_diffusion(
+                    base_yr, curr_yr, end_yr, 0, steepness)
+                np.testing.assert_allclose(result[yr_nr, steepness_nr], expected)
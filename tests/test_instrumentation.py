@@ -0,0 +1,42 @@
+import numpy as np
+from et_module import instrumentation
+from et_module import main_functions
+from et_module.main import main
+
+def test_record():
+    """
+    """
+    load_profiles = [
+        main_functions.LoadProfile(
+            name=name,
+            year=name[-8:-4],
+            shape_yd=np.full((365), 1/365),
+            shape_dh=np.full((24), 1/24))
+        for name in ['av_lp_2015.csv', 'av_lp_2050.csv']]
+
+    with instrumentation.record(trace_memory=True) as recorder:
+        for curr_yr in [2020, 2030]:
+            main_functions.load_curve_assignement(
+                curr_yr=curr_yr,
+                base_yr=2015,
+                yr_until_changed=2050,
+                et_service_demand_yh=np.ones((3, 8760)),
+                load_profiles=load_profiles,
+                regions=['regA', 'regB', 'regC'],
+                charging_scenario='sheduled')
+
+        main(['regA', 'regB'], 2020, np.ones((2, 24)), np.ones((2, 24)))
+
+    summary = recorder.summary()
+
+    assert list(summary.index) == [
+        'diffusion', 'profile_blending', 'disaggregation', 'peak_hour', 'capacity']
+    assert summary.loc['disaggregation', 'calls'] == 2
+    assert summary.loc['disaggregation', 'array_bytes'] == 2 * 3 * 8760 * 8
+    assert summary.loc['disaggregation', 'allocated_bytes'] >= 3 * 8760 * 8
+    assert 'disaggregation' in recorder.report()
+
+    # Nothing is recorded if instrumentation is disabled
+    main(['regA', 'regB'], 2020, np.ones((2, 24)), np.ones((2, 24)))
+    assert len(recorder.records) == 8
+    assert instrumentation.stage('capacity') is instrumentation.stage('peak_hour')
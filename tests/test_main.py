@@ -1,5 +1,7 @@
-from et_module.main import main
+from et_module.main import main, v2g_g2v_capacity, fleet_capacity_yh
+from et_module import main_functions
 import numpy as np
+import pytest
 
 
 class TestMainRunner:
@@ -14,4 +16,222 @@ class TestMainRunner:
         actual = main(regions, timestep, trips, elec)
         expected = np.array([150.,  75.,  30.])
 
-        np.testing.assert_allclose(actual, expected)
\ No newline at end of file
+        np.testing.assert_allclose(actual, expected)
+
+    def test_main_runner_out_buffer(self):
+
+        regions = ['A', 'B', 'C']
+        timestep = 2010
+        trips = np.array([[0, 10, 0], [5, 0, 5], [2, 2, 0]])
+        elec = np.array([[0, 10, 0], [5, 0, 5], [1, 2, 0]])
+
+        out = np.full((3), np.nan)
+        actual = main(regions, timestep, trips, elec, out=out)
+
+        # Trips in the peak hour of electricity demand times 30 kWh
+        expected = np.array([10, 5, 2]) * 30.0
+
+        assert actual is out
+        np.testing.assert_allclose(out, expected)
+
+    def test_main_runner_batch_axes(self):
+
+        regions = ['A', 'B', 'C']
+        timestep = 2010
+        rng = np.random.RandomState(0)
+        trips = rng.randint(0, 20, size=(4, 2, 3, 24))
+        elec = rng.rand(4, 2, 3, 24)
+
+        actual = main(regions, timestep, trips, elec)
+
+        assert actual.shape == (4, 2, 3)
+
+        for scenario_nr in range(4):
+            for timestep_nr in range(2):
+                expected = main(
+                    regions,
+                    timestep,
+                    trips[scenario_nr, timestep_nr],
+                    elec[scenario_nr, timestep_nr])
+                np.testing.assert_allclose(actual[scenario_nr, timestep_nr], expected)
+
+    def test_v2g_g2v_capacity(self):
+
+        trips = np.array([[0, 10, 0], [5, 0, 5], [0, 0, 0], [1, 0, 0]])
+        elec = np.array([[0, 10, 0], [5, 0, 5], [0, 0, 0], [40, 0, 0]])
+
+        v2g, g2v = v2g_g2v_capacity(
+            trips,
+            elec,
+            assumption_ev_p_with_v2g_capability=0.5,
+            assumption_av_charging_state=0.5,
+            assumption_safety_margin=0.1,
+            assumption_av_usable_battery_capacity=30.0)
+
+        # Region A: 5 V2G EVs, C_max 150, used 5 + 15, SOC_av 75
+        # Region B: 2.5 V2G EVs, C_max 75, used 2.5 + 7.5, SOC_av 37.5
+        # Region C: No trips
+        # Region D: 0.5 V2G EVs, C_max 15, used 20 + 1.5 > C_max
+        np.testing.assert_allclose(v2g, [75, 37.5, 0, 0])
+        np.testing.assert_allclose(g2v, [75, 37.5, 0, 7.5])
+
+        # Assumptions per region
+        v2g, g2v = v2g_g2v_capacity(
+            trips,
+            elec,
+            assumption_ev_p_with_v2g_capability=np.array([1, 0.5, 0.5, 0.5]))
+
+        np.testing.assert_allclose(v2g, [150, 37.5, 0, 0])
+
+        # Assumptions per sample (samples, 1) broadcast against the regions
+        capacity = np.array([[20.0], [30.0], [40.0]])
+        nr_ev_per_trip = np.array([[1.0], [2.0], [1.5]])
+        v2g, g2v = v2g_g2v_capacity(
+            trips,
+            elec,
+            assumption_av_usable_battery_capacity=capacity,
+            assumption_nr_ev_per_trip=nr_ev_per_trip)
+
+        assert v2g.shape == g2v.shape == (3, 4)
+        for sample_nr in range(3):
+            v2g_sample, g2v_sample = v2g_g2v_capacity(
+                trips,
+                elec,
+                assumption_av_usable_battery_capacity=capacity[sample_nr, 0],
+                assumption_nr_ev_per_trip=nr_ev_per_trip[sample_nr, 0])
+            np.testing.assert_allclose(v2g[sample_nr], v2g_sample)
+            np.testing.assert_allclose(g2v[sample_nr], g2v_sample)
+
+    def test_main_runner_float32(self):
+
+        regions = ['A', 'B', 'C']
+        timestep = 2010
+        rng = np.random.RandomState(0)
+        trips = rng.randint(0, 20, size=(3, 24))
+        elec = rng.rand(3, 24)
+
+        actual = main(regions, timestep, trips, elec, dtype=np.float32)
+        expected = main(regions, timestep, trips, elec)
+
+        assert actual.dtype == np.float32
+        np.testing.assert_allclose(actual, expected, rtol=1e-6)
+
+        v2g, g2v = v2g_g2v_capacity(trips, elec, dtype=np.float32)
+        expected_v2g, expected_g2v = v2g_g2v_capacity(trips, elec)
+
+        assert v2g.dtype == np.float32 and g2v.dtype == np.float32
+        np.testing.assert_allclose(v2g, expected_v2g, rtol=1e-6)
+        np.testing.assert_allclose(g2v, expected_g2v, rtol=1e-6)
+
+    def test_main_runner_fingerprints(self):
+
+        regions = ['A', 'B', 'C', 'D']
+        timestep = 2010
+        rng = np.random.RandomState(0)
+        trips = rng.randint(0, 20, size=(4, 24))
+        elec = rng.rand(4, 24)
+
+        fingerprints = main_functions.RegionFingerprints()
+        out = main(regions, timestep, trips, elec, fingerprints=fingerprints)
+
+        trips[2, np.argmax(elec[2])] += 5
+        actual = main(regions, timestep, trips, elec, fingerprints=fingerprints)
+
+        assert actual is out
+        assert fingerprints.nr_of_dirty == 1
+        np.testing.assert_allclose(actual, main(regions, timestep, trips, elec))
+
+        # A changed assumption or number of peak hours changes all regions
+        for kwargs in [
+                dict(assumption_av_usable_battery_capacity=60.0),
+                dict(assumption_av_usable_battery_capacity=60.0, assumption_nr_ev_per_trip=2),
+                dict(assumption_av_usable_battery_capacity=60.0, assumption_nr_ev_per_trip=2, nr_of_peak_hours=3)]:
+            actual = main(regions, timestep, trips, elec, fingerprints=fingerprints, **kwargs)
+
+            assert fingerprints.nr_of_dirty == 4
+            np.testing.assert_allclose(actual, main(regions, timestep, trips, elec, **kwargs))
+
+        # Assumptions of every region cannot be fingerprinted
+        with pytest.raises(SystemExit):
+            main(
+                regions, timestep, trips, elec, fingerprints=fingerprints,
+                assumption_av_usable_battery_capacity=np.full((4), 30.0))
+
+    def test_fleet_capacity_yh(self):
+
+        rng = np.random.RandomState(0)
+        trips = rng.randint(0, 20, size=(3, 24))
+        trips[2] = 0
+        et_demand_yh = rng.rand(3, 8760) * 10
+
+        # More charging in the first half of the year than in the second
+        et_demand_yh[1, :4380] *= 3
+
+        v2g, g2v, soc = fleet_capacity_yh(trips, et_demand_yh, assumption_trip_duration=2)
+
+        # Reference stepping through every hour
+        for region_nr in range(3):
+            departures = np.tile(trips[region_nr], 365).astype(float)
+            arrivals = np.roll(departures, 2)
+            on_road = np.zeros(8760)
+            energy = np.zeros(8760)
+            energy_per_departure = et_demand_yh[region_nr].sum() / max(departures.sum(), 1)
+            for hour in range(8760):
+                on_road[hour] = on_road[hour - 1] * (hour > 0) + departures[hour] - arrivals[hour]
+            on_road -= on_road.min()
+            nr_of_ev = on_road.max()
+            capacity = nr_of_ev * 30.0
+            for hour in range(8760):
+                previous_energy = energy[hour - 1] if hour > 0 else capacity * 0.5
+                energy[hour] = min(max(
+                    previous_energy + et_demand_yh[region_nr, hour] - departures[hour] * energy_per_departure,
+                    0), capacity)
+            parked_capacity = (nr_of_ev - on_road) * 30.0 * 0.5
+            parked_energy = energy * (nr_of_ev - on_road) / max(nr_of_ev, 1) * 0.5
+
+            np.testing.assert_allclose(v2g[region_nr], np.clip(parked_energy - 0.1 * parked_capacity, 0, None), atol=1e-6)
+            np.testing.assert_allclose(g2v[region_nr], np.clip(parked_capacity - parked_energy, 0, None), atol=1e-6)
+            np.testing.assert_allclose(soc[region_nr], energy / max(capacity, 1), atol=1e-9)
+
+        # Full fleet in the first half and empty fleet in the second half of the year
+        assert np.any(soc[1, :4380] == 1) and np.any(soc[1, 4380:] == 0)
+
+        # No vehicles
+        assert not np.any(v2g[2]) and not np.any(g2v[2]) and not np.any(soc[2])
+        assert np.all(soc[:2] >= 0) and np.all(soc[:2] <= 1)
+
+    def test_fleet_capacity_yh_arrivals(self):
+
+        trips = np.zeros((2, 24))
+        trips[:, 8] = 10
+        arrivals = np.zeros((2, 24))
+        arrivals[:, 17] = 10
+        et_demand_yh = np.zeros((2, 8784))
+        et_demand_yh[:, 20::24] = 50
+
+        v2g, g2v, soc = fleet_capacity_yh(
+            trips, et_demand_yh, reg_arrivals_ev_24h=arrivals, nr_of_ev=[20, 10], dtype=np.float32)
+
+        assert v2g.shape == (2, 8784) and v2g.dtype == np.float32
+        v2g_dh = v2g.reshape(2, 366, 24)
+        g2v_dh = g2v.reshape(2, 366, 24)
+
+        # Half the fleet of region 0 and no vehicle of region 1 is parked during the day
+        np.testing.assert_allclose(v2g_dh[0, :, 8:17] + g2v_dh[0, :, 8:17], 10 * 30.0 * 0.5 * 0.9)
+        assert not np.any(v2g_dh[1, :, 8:17]) and not np.any(g2v_dh[1, :, 8:17])
+        np.testing.assert_allclose(v2g_dh[1, :, 17:] + g2v_dh[1, :, 17:], 10 * 30.0 * 0.5 * 0.9)
+
+        # Same state-of-charge every day
+        soc_dh = soc.reshape(2, 366, 24)
+        np.testing.assert_allclose(soc_dh, np.broadcast_to(soc_dh[:, :1], soc_dh.shape), atol=1e-4)
+
+    def test_main_runner_peak_hours(self):
+
+        regions = ['A', 'B']
+        timestep = 2010
+        trips = np.array([[0, 10, 20, 0], [5, 0, 5, 8]])
+        elec = np.array([[0, 10, 9.9, 0], [5, 1, 5, 0]])
+
+        np.testing.assert_allclose(main(regions, timestep, trips, elec), [300, 150])
+        np.testing.assert_allclose(
+            main(regions, timestep, trips, elec, nr_of_peak_hours=2), [600, 150])
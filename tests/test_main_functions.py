@@ -1,4 +1,7 @@
+import os
+import pytest
 import numpy as np
+import pandas as pd
 from et_module import main_functions
 
 def test_load_curve_assignement():
@@ -140,3 +143,698 @@ def test_load_curve_assignement():
     expected = (by + ((ey - by) * half_between_cy_and_ey)) * 8760
 
     assert result[reg_array_nr][year_hour_nr] == expected
+
+def test_load_curve_assignement_years(load_profiles):
+    """
+    """
+    et_service_demand_yh = {
+        'regA': np.ones((365, 24)),
+        'regB': np.ones((365, 24)) * 2}
+
+    regions = ['regA', 'regB']
+
+    curr_yrs = [2000, 2025, 2050, 2060]
+
+    for diffusion in ['linear', 'sigmoid']:
+        result = main_functions.load_curve_assignement_years(
+            curr_yrs=curr_yrs,
+            base_yr=2000,
+            yr_until_changed=2050,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled',
+            diffusion=diffusion)
+
+        assert result.shape == (4, 2, 8760)
+
+        for year_nr, curr_yr in enumerate(curr_yrs):
+            expected = main_functions.load_curve_assignement(
+                curr_yr=curr_yr,
+                base_yr=2000,
+                yr_until_changed=2050,
+                et_service_demand_yh=et_service_demand_yh,
+                load_profiles=load_profiles,
+                regions=regions,
+                charging_scenario='sheduled',
+                diffusion=diffusion)
+
+            np.testing.assert_allclose(result[year_nr], expected)
+
+def test_calc_diffusion_p():
+    """
+    """
+    curr_yrs = np.array([2015, 2020, 2030, 2050, 2060])
+
+    for diffusion in ['linear', 'sigmoid']:
+        result = main_functions.calc_diffusion_p(
+            curr_yr=curr_yrs, base_yr=2015, yr_until_changed=2050, diffusion=diffusion)
+
+        assert result[0] == 0 and result[3] == 1 and result[4] == 1
+        assert 0 < result[1] < result[2] < 1
+
+        # Scalar, batched and sampled years give the same fractions
+        for curr_yr, expected in zip(curr_yrs, result):
+            assert main_functions.calc_diffusion_p(
+                curr_yr=int(curr_yr), base_yr=2015, yr_until_changed=2050, diffusion=diffusion) == expected
+        np.testing.assert_array_equal(
+            main_functions.calc_diffusion_p(
+                curr_yr=2030, base_yr=2015, yr_until_changed=np.array([2020, 2030, 2050]), diffusion=diffusion),
+            [1, 1, result[2]])
+
+    # Base year has priority
+    assert main_functions.calc_diffusion_p(
+        curr_yr=2015, base_yr=2015, yr_until_changed=2015, diffusion='linear') == 0
+
+def test_get_service_demand_y():
+    """
+    """
+    regions = ['regA', 'regB']
+    demand_yh = np.stack([np.ones((365, 24)), np.full((365, 24), 2.0)])
+    expected = np.array([8760, 17520])
+
+    # dict
+    et_service_demand_yh = {'regA': demand_yh[0], 'regB': demand_yh[1]}
+    result = main_functions.get_service_demand_y(et_service_demand_yh, regions)
+    np.testing.assert_array_equal(result, expected)
+
+    # array (regions, 365, 24) and (regions, 8760)
+    result = main_functions.get_service_demand_y(demand_yh, regions)
+    np.testing.assert_array_equal(result, expected)
+    result = main_functions.get_service_demand_y(demand_yh.reshape(2, 8760), regions)
+    np.testing.assert_array_equal(result, expected)
+
+    # DataFrame (different row order than regions)
+    df = pd.DataFrame(demand_yh.reshape(2, 8760)[::-1], index=['regB', 'regA'])
+    result = main_functions.get_service_demand_y(df, regions)
+    np.testing.assert_array_equal(result, expected)
+
+    # float32 inputs are summed in float64
+    demand_yh = np.random.RandomState(0).rand(2, 8760).astype(np.float32)
+    expected = demand_yh.astype(np.float64).sum(axis=1)
+    for et_service_demand_yh in [
+            demand_yh,
+            {'regA': demand_yh[0], 'regB': demand_yh[1]},
+            pd.DataFrame(demand_yh, index=regions)]:
+        result = main_functions.get_service_demand_y(et_service_demand_yh, regions)
+        assert result.dtype == np.float64
+        np.testing.assert_allclose(result, expected, rtol=1e-12)
+
+def test_profile_cache(load_profiles):
+    """
+    """
+    et_service_demand_yh = np.ones((2, 365, 24))
+    regions = ['regA', 'regB']
+
+    profile_cache = main_functions.ProfileCache(maxsize=2)
+
+    results = []
+    for curr_yr in [2020, 2020, 2030, 2040, 2020]:
+        results.append(main_functions.load_curve_assignement(
+            curr_yr=curr_yr,
+            base_yr=2015,
+            yr_until_changed=2050,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled',
+            profile_cache=profile_cache))
+
+    # 2020 is evicted by 2030 and 2040
+    assert profile_cache.hits == 1
+    assert profile_cache.misses == 4
+    assert len(profile_cache) == 2
+
+    # The registry of the list of load profiles is built once
+    load_profile_registry = profile_cache.get_registry(load_profiles)
+    assert profile_cache.get_registry(list(load_profiles)) is load_profile_registry
+    assert profile_cache.get_registry(load_profiles[::-1]) is not load_profile_registry
+
+    expected = main_functions.load_curve_assignement(
+        curr_yr=2020,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled')
+    np.testing.assert_array_equal(results[1], expected)
+    np.testing.assert_array_equal(results[4], expected)
+
+    # Assigning a new shape invalidates cached profiles
+    load_profiles[1].shape_yh = load_profiles[0].shape_yh
+    result = main_functions.load_curve_assignement(
+        curr_yr=2040,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled',
+        profile_cache=profile_cache)
+
+    assert profile_cache.misses == 5
+    np.testing.assert_allclose(result, 1)
+
+    profile_cache.clear()
+    assert len(profile_cache) == 0
+
+def test_load_profile_registry():
+    """
+    """
+    shape_yd = np.full((365), 1/365)
+    load_profiles = [
+        main_functions.LoadProfile(
+            name='av_lp_{}.csv'.format(year),
+            year=str(year),
+            shape_yd=shape_yd,
+            shape_yh=np.full((365, 24), value))
+        for year, value in [(2015, 0.0), (2030, 3.0), (2050, 4.0)]]
+
+    load_profile_registry = main_functions.LoadProfileRegistry(
+        load_profiles,
+        scenario_profiles={
+            'sheduled': ['av_lp_2015.csv', 'av_lp_2050.csv'],
+            'three_anchors': ['av_lp_2015.csv', 'av_lp_2030.csv', 'av_lp_2050.csv']})
+
+    assert load_profile_registry.get('av_lp_2030.csv') is load_profiles[1]
+    assert load_profile_registry.get_year(2050) == [load_profiles[2]]
+    assert load_profile_registry.get_scenario('sheduled') == [load_profiles[0], load_profiles[2]]
+    assert load_profile_registry.stacked_yh.shape == (3, 365, 24)
+
+    # Two anchors
+    result = load_profile_registry.blend('sheduled', 0.25)
+    np.testing.assert_allclose(result, 1.0)
+
+    # Three anchors: 2030 is at 15/35 of the diffusion scale
+    result = load_profile_registry.blend('three_anchors', np.array([0, 7.5/35, 15/35, 25/35, 1, 1.5]))
+    np.testing.assert_allclose(result[:, 0, 0], [0, 1.5, 3, 3.5, 4, 4])
+
+    for simulation_year_p in [0, 7.5/35, 25/35, 1]:
+        result = load_profile_registry.blend('three_anchors', simulation_year_p)
+        expected = load_profile_registry.blend('three_anchors', np.array([simulation_year_p]))[0]
+        np.testing.assert_allclose(result, expected)
+
+    # Assigning a new shape updates the stacked profiles
+    load_profiles[2].shape_yh = np.full((365, 24), 8.0)
+    result = load_profile_registry.blend('sheduled', 0.25)
+    np.testing.assert_allclose(result, 2.0)
+
+    # Missing charging scenario
+    with pytest.raises(SystemExit):
+        load_profile_registry.blend('unsheduled', 0.5)
+
+def test_factorized_load_curve(load_profiles):
+    """
+    """
+    et_service_demand_yh = np.stack([np.ones((365, 24)), np.full((365, 24), 2.0)])
+    regions = ['regA', 'regB']
+
+    assert load_profiles[1].shape_yh.shape == (365, 24)
+
+    kwargs = dict(
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled')
+
+    expected = main_functions.load_curve_assignement(curr_yr=2030, **kwargs)
+    result = main_functions.load_curve_assignement(curr_yr=2030, output='factorized', **kwargs)
+
+    assert result.shape == (2, 8760)
+    np.testing.assert_allclose(result.et_service_demand_y, [8760, 17520])
+    np.testing.assert_allclose(np.asarray(result), expected)
+    np.testing.assert_allclose(result.get_regions(1), expected[1])
+    np.testing.assert_allclose(result.get_regions([1, 0]), expected[[1, 0]])
+    np.testing.assert_allclose(result.get_total_yh(), expected.sum(axis=0))
+    np.testing.assert_allclose(result.get_peak_h(), expected.max(axis=1))
+
+    # Several years
+    expected = main_functions.load_curve_assignement_years(curr_yrs=[2015, 2030], **kwargs)
+    result = main_functions.load_curve_assignement_years(
+        curr_yrs=[2015, 2030], output='factorized', **kwargs)
+
+    assert result.shape == (2, 2, 8760)
+    np.testing.assert_allclose(result.to_array(), expected)
+    np.testing.assert_allclose(result.get_peak_h(), expected.max(axis=2))
+
+def test_load_curve_assignement_float32(path_load_profiles):
+    """
+    """
+    et_service_demand_yh = np.random.RandomState(0).rand(5, 365, 24)
+    regions = ['reg{}'.format(nr) for nr in range(5)]
+
+    results = {}
+    for dtype in [np.float64, np.float32]:
+        load_profiles = main_functions.get_load_profiles(str(path_load_profiles), dtype=dtype)
+        assert load_profiles[0].shape_yh.dtype == dtype
+
+        results[dtype] = main_functions.load_curve_assignement(
+            curr_yr=2030,
+            base_yr=2015,
+            yr_until_changed=2050,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled',
+            dtype=dtype)
+
+        assert results[dtype].dtype == dtype
+
+        result_years = main_functions.load_curve_assignement_years(
+            curr_yrs=[2030],
+            base_yr=2015,
+            yr_until_changed=2050,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled',
+            dtype=dtype)
+
+        assert result_years.dtype == dtype
+
+    np.testing.assert_allclose(
+        results[np.float32],
+        results[np.float64],
+        rtol=main_functions.DTYPE_RTOL[np.dtype(np.float32)])
+
+def test_load_curve_assignement_chunks(load_profiles):
+    """
+    """
+    et_service_demand_yh = np.random.RandomState(0).rand(7, 365, 24)
+    regions = ['reg{}'.format(nr) for nr in range(7)]
+
+    kwargs = dict(
+        curr_yr=2030,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled')
+
+    expected = main_functions.load_curve_assignement(**kwargs)
+
+    chunks = list(main_functions.load_curve_assignement_chunks(chunk_size=3, **kwargs))
+
+    assert [region_nrs for region_nrs, _ in chunks] == [slice(0, 3), slice(3, 6), slice(6, 7)]
+
+    for region_nrs, et_demand_yh in chunks:
+        np.testing.assert_array_equal(et_demand_yh, expected[region_nrs])
+
+def test_open_demand_memmap(tmp_path, load_profiles):
+    """
+    """
+    et_service_demand_yh = np.random.RandomState(0).rand(3, 365, 24)
+    regions = ['regA', 'regB', 'regC']
+    curr_yrs = [2015, 2030, 2050]
+
+    kwargs = dict(
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled',
+        dtype=np.float32)
+
+    expected = main_functions.load_curve_assignement_years(curr_yrs=curr_yrs, **kwargs)
+
+    # Every simulation year is written into its slice
+    path = str(tmp_path / 'et_demand_yh.npy')
+    et_demand_yh = main_functions.open_demand_memmap(path, 3, 3, dtype=np.float32)
+    for year_nr, curr_yr in enumerate(curr_yrs):
+        result = main_functions.load_curve_assignement(
+            curr_yr=curr_yr, out=et_demand_yh[year_nr], **kwargs)
+        assert np.shares_memory(result, et_demand_yh)
+    et_demand_yh.flush()
+    del et_demand_yh
+
+    np.testing.assert_allclose(np.load(path, mmap_mode='r'), expected, rtol=1e-6)
+
+    # All years written at once into existing file
+    et_demand_yh = main_functions.open_demand_memmap(path, 3, 3, mode='r+')
+    et_demand_yh[:] = 0
+    main_functions.load_curve_assignement_years(curr_yrs=curr_yrs, out=et_demand_yh, **kwargs)
+
+    np.testing.assert_array_equal(et_demand_yh, expected)
+
+def test_read_load_shapes(tmp_path):
+    """
+    """
+    hours = [23] + list(range(23))
+    path_to_csv = str(tmp_path / 'av_lp_2015.csv')
+    with open(path_to_csv, 'w') as csvfile:
+        csvfile.write(",".join(str(hour) for hour in hours) + "\n")
+        csvfile.write(",".join(str(hour) for hour in hours) + "\n")
+        csvfile.write(",".join(str(hour * 2) for hour in hours) + "\n")
+
+    expected = np.array([np.arange(24), np.arange(24) * 2], dtype=float)
+
+    result = main_functions.read_load_shapes(path_to_csv)
+    np.testing.assert_array_equal(result, expected)
+    assert os.path.isfile(path_to_csv + '.npz')
+
+    # Read from cache
+    result = main_functions.read_load_shapes(path_to_csv)
+    np.testing.assert_array_equal(result, expected)
+
+    # Last row
+    result = main_functions.read_load_shape(path_to_csv)
+    np.testing.assert_array_equal(result, expected[1])
+
+    # Changed csv file invalidates cache
+    with open(path_to_csv, 'w') as csvfile:
+        csvfile.write(",".join(str(hour) for hour in range(24)) + "\n")
+        csvfile.write(",".join("1" for hour in range(24)) + "\n")
+
+    result = main_functions.read_load_shapes(path_to_csv)
+    np.testing.assert_array_equal(result, np.ones((1, 24)))
+
+    # Headings are not hours
+    with open(path_to_csv, 'w') as csvfile:
+        csvfile.write(",".join(str(hour) for hour in range(1, 25)) + "\n")
+        csvfile.write(",".join("1" for hour in range(24)) + "\n")
+
+    with pytest.raises(SystemExit):
+        main_functions.read_load_shapes(path_to_csv, cache=False)
+
+def test_get_calendar():
+    """
+    """
+    month_nrs, day_type_nrs = main_functions.get_calendar(2015, ('2015-12-25', ))
+
+    assert len(month_nrs) == 365
+    assert month_nrs[31] == 1 and month_nrs[-1] == 11
+    # 2015-01-01 was a Thursday, 2015-01-03 a Saturday
+    assert list(day_type_nrs[:5]) == [0, 0, 1, 1, 0]
+    assert day_type_nrs[358] == 2
+
+    month_nrs, day_type_nrs = main_functions.get_calendar(2016)
+    assert len(month_nrs) == 366
+
+def test_day_type_profile():
+    """
+    """
+    weekday_dh = np.zeros((24))
+    weekday_dh[18] = 1
+    weekend_dh = np.full((24), 1/24)
+
+    day_type_profile = main_functions.DayTypeProfile(
+        name='av_lp_2015.csv',
+        year=2015,
+        shapes_dh=np.array([weekday_dh, weekend_dh * 2]),
+        day_weights=[1, 0.5],
+        holidays=['2015-01-01', '2016-01-01'])
+
+    load_profile = day_type_profile.get_load_profile(2015)
+
+    assert load_profile.shape_yh.shape == (365, 24)
+    assert load_profile is day_type_profile.get_load_profile(2015)
+    np.testing.assert_allclose(np.sum(load_profile.shape_yh), 1)
+
+    # 2015: 261 weekdays, 104 weekend days incl. holiday on 2015-01-01 (Thursday)
+    weekday_share = 1 / (260 + 105 * 0.5)
+    np.testing.assert_allclose(load_profile.shape_yh[1], weekday_dh * weekday_share)
+    np.testing.assert_allclose(load_profile.shape_yh[0], weekend_dh * weekday_share * 0.5)
+    np.testing.assert_allclose(load_profile.shape_yh[2], weekend_dh * weekday_share * 0.5)
+
+    # Leap year
+    load_profile = day_type_profile.get_load_profile(2016)
+    assert load_profile.shape_yh.shape == (366, 24)
+
+    # Monthly profiles
+    shapes_dh = np.ones((12, 1, 24)) * np.arange(1, 13)[:, np.newaxis, np.newaxis]
+    shapes_dh[:, :, 0] = 0
+    day_type_profile = main_functions.DayTypeProfile(
+        name='av_lp_2015.csv',
+        year=2015,
+        shapes_dh=shapes_dh,
+        day_weights=np.arange(1, 13)[:, np.newaxis])
+
+    shape_yd = day_type_profile.get_load_profile(2015).shape_yd
+    assert shape_yd[31] == 2 * shape_yd[0]
+
+def test_load_curve_assignement_leap_year():
+    """
+    """
+    day_type_profiles = [
+        main_functions.DayTypeProfile(
+            name=name,
+            year=name[-8:-4],
+            shapes_dh=np.ones((2, 24)))
+        for name in ['av_lp_2015.csv', 'av_lp_2050.csv']]
+
+    result = main_functions.load_curve_assignement(
+        curr_yr=2016,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=np.ones((2, 8784)),
+        load_profiles=main_functions.get_calendar_load_profiles(day_type_profiles, 2016),
+        regions=['regA', 'regB'],
+        charging_scenario='sheduled')
+
+    assert result.shape == (2, 8784)
+    np.testing.assert_allclose(result, 1)
+
+def test_region_index():
+    """
+    """
+    region_index = main_functions.RegionIndex(['regA', 'regB', 'regC', 'regD'])
+
+    assert len(region_index) == 4
+    assert list(region_index) == ['regA', 'regB', 'regC', 'regD']
+    assert 'regC' in region_index
+    assert 'regE' not in region_index
+    np.testing.assert_array_equal(region_index.get_positions(['regD', 'regA']), [3, 0])
+
+    # Other ordering of a subset of the regions
+    transport_regions = main_functions.RegionIndex(['regC', 'regA'])
+    array = np.arange(4 * 3).reshape(4, 3)
+
+    np.testing.assert_array_equal(
+        region_index.reindex(array, transport_regions), array[[2, 0]])
+    np.testing.assert_array_equal(
+        region_index.reindex(array.T, ['regC', 'regA'], axis=1), array[[2, 0]].T)
+
+    # Gather positions are calculated once for every ordering
+    assert region_index.get_reindexer(transport_regions) is region_index.get_reindexer(['regC', 'regA'])
+    assert main_functions.get_region_index(region_index) is region_index
+    assert main_functions.get_region_index(['regC', 'regA']) is main_functions.get_region_index(('regC', 'regA'))
+
+    # Back into the ordering of all regions
+    np.testing.assert_array_equal(
+        transport_regions.reindex(region_index.reindex(array, transport_regions), ['regA', 'regC']),
+        array[[0, 2]])
+
+    with pytest.raises(SystemExit):
+        region_index.get_positions(['regE'])
+    with pytest.raises(SystemExit):
+        main_functions.RegionIndex(['regA', 'regA'])
+
+def test_load_curve_assignement_region_index():
+    """
+    """
+    regions = main_functions.RegionIndex(['regA', 'regB'])
+    et_service_demand_yh = pd.DataFrame(
+        [np.full((8760), 2.0), np.full((8760), 1.0)], index=['regB', 'regA'])
+
+    np.testing.assert_allclose(
+        main_functions.get_service_demand_y(et_service_demand_yh, regions), [8760, 2 * 8760])
+    np.testing.assert_allclose(
+        main_functions.get_service_demand_y(
+            {'regB': np.ones((365, 24)), 'regA': np.zeros((365, 24))}, regions), [0, 8760])
+
+    # Dict with more regions than the model run
+    np.testing.assert_allclose(
+        main_functions.get_service_demand_y(
+            {'regC': np.ones((365, 24)), 'regB': np.ones((365, 24)), 'regA': np.zeros((365, 24))},
+            regions), [0, 8760])
+
+    with pytest.raises(SystemExit):
+        main_functions.get_service_demand_y({'regB': np.ones((365, 24))}, regions)
+
+def test_load_curve_assignement_fingerprints(load_profiles):
+    """
+    """
+    regions = ['reg{}'.format(nr) for nr in range(6)]
+    et_service_demand_yh = np.random.RandomState(0).rand(6, 8760)
+
+    kwargs = dict(
+        base_yr=2015,
+        yr_until_changed=2050,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled')
+
+    fingerprints = main_functions.RegionFingerprints()
+    et_demand_yh = main_functions.load_curve_assignement(
+        curr_yr=2030, et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, **kwargs)
+    assert fingerprints.nr_of_dirty == 6
+
+    # Only the changed regions are recalculated
+    et_service_demand_yh[[1, 4], 100] += 1
+    actual = main_functions.load_curve_assignement(
+        curr_yr=2030, et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, **kwargs)
+
+    assert actual is et_demand_yh
+    assert fingerprints.nr_of_dirty == 2
+    np.testing.assert_allclose(actual, main_functions.load_curve_assignement(
+        curr_yr=2030, et_service_demand_yh=et_service_demand_yh, **kwargs))
+
+    # A new current year profile changes all regions
+    actual = main_functions.load_curve_assignement(
+        curr_yr=2040, et_service_demand_yh=et_service_demand_yh, fingerprints=fingerprints, **kwargs)
+
+    assert fingerprints.nr_of_dirty == 6
+    np.testing.assert_allclose(actual, main_functions.load_curve_assignement(
+        curr_yr=2040, et_service_demand_yh=et_service_demand_yh, **kwargs))
+
+def test_get_fingerprints():
+    """
+    """
+    values = np.random.RandomState(0).rand(2, 3, 24)
+    fingerprints = main_functions.get_fingerprints((values, values[..., :5]), (2, 3))
+
+    changed_values = values.copy()
+    changed_values[1, 2, 7] = np.nextafter(changed_values[1, 2, 7], 2)
+    changed_fingerprints = main_functions.get_fingerprints((changed_values, changed_values[..., :5]), (2, 3))
+
+    assert fingerprints.shape == (2, 3)
+    np.testing.assert_array_equal(fingerprints != changed_fingerprints, [[0, 0, 0], [0, 0, 1]])
+
+def test_peak_analytics():
+    """
+    """
+    values_yh = np.random.RandomState(0).rand(3, 8760)
+    values_yh[1, [10, 20]] = 2
+
+    peak_hours, peak_values = main_functions.get_peak_hours(values_yh, 5)
+
+    np.testing.assert_array_equal(peak_values, -np.sort(-values_yh, axis=1)[:, :5])
+    np.testing.assert_array_equal(np.take_along_axis(values_yh, peak_hours, axis=1), peak_values)
+    np.testing.assert_array_equal(peak_hours[1, :2], [10, 20])
+
+    start_hours, window_sums = main_functions.get_peak_window(values_yh, 4)
+    all_window_sums = np.array([
+        [values_yh[region_nr, hour:hour + 4].sum() for hour in range(8760 - 3)]
+        for region_nr in range(3)])
+
+    np.testing.assert_array_equal(start_hours, np.argmax(all_window_sums, axis=1))
+    np.testing.assert_allclose(window_sums, np.max(all_window_sums, axis=1))
+
+    load_duration_curve = main_functions.get_load_duration_curve(values_yh)
+    np.testing.assert_array_equal(load_duration_curve, -np.sort(-values_yh, axis=1))
+    np.testing.assert_array_equal(
+        main_functions.get_load_duration_curve(values_yh, nr_of_points=5),
+        load_duration_curve[:, [0, 2190, 4380, 6569, 8759]])
+
+@pytest.mark.parametrize('use_scipy', [True, False])
+def test_load_curve_assignement_profile_assignment(monkeypatch, use_scipy):
+    """
+    """
+    if not use_scipy:
+        monkeypatch.setattr(main_functions, 'scipy', None)
+    elif main_functions.scipy is None:
+        pytest.skip("scipy is not installed")
+
+    load_profiles = [
+        main_functions.LoadProfile(
+            name='{}_{}.csv'.format(profile_name, year),
+            year=year,
+            shape_yd=np.full((365), 1/365),
+            shape_dh=shape_dh)
+        for profile_name, shape_dh in [
+            ('urban', np.arange(24) / np.sum(np.arange(24))),
+            ('rural', np.arange(24)[::-1] / np.sum(np.arange(24))),
+            ('flat', np.full((24), 1/24))]
+        for year in [2015, 2050]]
+
+    load_profile_registry = main_functions.LoadProfileRegistry(
+        load_profiles,
+        scenario_profiles={
+            profile_name: ['{}_2015.csv'.format(profile_name), '{}_2050.csv'.format(profile_name)]
+            for profile_name in ['urban', 'rural', 'flat']})
+
+    regions = ['regA', 'regB', 'regC', 'regD']
+    et_service_demand_yh = np.random.RandomState(0).rand(4, 8760)
+
+    profile_assignment = main_functions.ProfileAssignment(
+        regions,
+        ['urban', 'rural', 'flat'],
+        {'regA': 'urban', 'regB': {'urban': 1, 'rural': 3}, 'regC': 'flat', 'regD': 'rural'})
+
+    np.testing.assert_allclose(profile_assignment.to_array(), [
+        [1, 0, 0], [0.25, 0.75, 0], [0, 0, 1], [0, 1, 0]])
+    assert (profile_assignment.matrix is None) != use_scipy
+
+    kwargs = dict(
+        curr_yr=2030,
+        base_yr=2015,
+        yr_until_changed=2050,
+        load_profiles=load_profile_registry,
+        regions=regions)
+
+    actual = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh,
+        charging_scenario=profile_assignment,
+        **kwargs)
+
+    expected = {
+        profile_name: main_functions.load_curve_assignement(
+            et_service_demand_yh=et_service_demand_yh,
+            charging_scenario=profile_name,
+            **kwargs)
+        for profile_name in ['urban', 'rural', 'flat']}
+
+    np.testing.assert_allclose(actual[0], expected['urban'][0])
+    np.testing.assert_allclose(actual[1], 0.25 * expected['urban'][1] + 0.75 * expected['rural'][1])
+    np.testing.assert_allclose(actual[2], expected['flat'][2])
+    np.testing.assert_allclose(actual[3], expected['rural'][3])
+
+    # Same weights from a dense array and recalculation of changed regions only
+    profile_assignment = main_functions.ProfileAssignment(
+        regions, ['urban', 'rural', 'flat'], profile_assignment.to_array() * 2)
+    fingerprints = main_functions.RegionFingerprints()
+    main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh,
+        charging_scenario=profile_assignment,
+        fingerprints=fingerprints,
+        **kwargs)
+    et_service_demand_yh[1] *= 2
+    actual_incremental = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh,
+        charging_scenario=profile_assignment,
+        fingerprints=fingerprints,
+        **kwargs)
+
+    assert fingerprints.nr_of_dirty == 1
+    np.testing.assert_allclose(actual_incremental, np.concatenate([actual[:1], actual[1:2] * 2, actual[2:]]))
+
+    # Another assignment with the same profiles changes all regions
+    other_profile_assignment = main_functions.ProfileAssignment(
+        regions, ['urban', 'rural', 'flat'], {'regA': 'rural', 'regB': 'urban', 'regC': 'flat', 'regD': 'rural'})
+    actual_incremental = main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh,
+        charging_scenario=other_profile_assignment,
+        fingerprints=fingerprints,
+        **kwargs)
+
+    assert fingerprints.nr_of_dirty == 4
+    np.testing.assert_allclose(actual_incremental, main_functions.load_curve_assignement(
+        et_service_demand_yh=et_service_demand_yh,
+        charging_scenario=other_profile_assignment,
+        **kwargs))
+
+    # Regions of the assignment in another order
+    with pytest.raises(SystemExit):
+        main_functions.load_curve_assignement(
+            et_service_demand_yh=et_service_demand_yh,
+            charging_scenario=main_functions.ProfileAssignment(
+                regions[::-1], ['urban', 'rural', 'flat'], other_profile_assignment.to_array()[::-1]),
+            **kwargs)
+
+    with pytest.raises(SystemExit):
+        main_functions.ProfileAssignment(regions, ['urban'], {'regA': 'urban'})
@@ -0,0 +1,38 @@
+import numpy as np
+from et_module import main_functions
+from et_module import scenario_functions
+
+def test_run_scenarios(load_profiles):
+    """
+    """
+    et_service_demand_yh = np.random.RandomState(0).rand(3, 365, 24)
+    regions = ['regA', 'regB', 'regC']
+
+    result = scenario_functions.run_scenarios(
+        charging_scenarios=['unsheduled', 'sheduled'],
+        diffusions=['linear', 'sigmoid'],
+        curr_yrs=[2015, 2030],
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        max_workers=2)
+
+    assert result.shape == (2 * 2 * 2 * 3, 8760)
+    assert result.index.names == ['charging_scenario', 'diffusion', 'year', 'region']
+
+    for charging_scenario in ['unsheduled', 'sheduled']:
+        for diffusion in ['linear', 'sigmoid']:
+            expected = main_functions.load_curve_assignement(
+                curr_yr=2030,
+                base_yr=2015,
+                yr_until_changed=2050,
+                et_service_demand_yh=et_service_demand_yh,
+                load_profiles=load_profiles,
+                regions=regions,
+                charging_scenario=charging_scenario,
+                diffusion=diffusion)
+
+            np.testing.assert_allclose(
+                result.sort_index().loc[(charging_scenario, diffusion, 2030)].to_numpy(), expected)
@@ -0,0 +1,93 @@
+import tracemalloc
+import pytest
+import numpy as np
+from et_module import main_functions
+from et_module.main import main
+from et_module.uncertainty_functions import run_uncertainty
+
+def test_run_uncertainty(load_profiles):
+    """
+    """
+    rng = np.random.RandomState(0)
+    regions = ['regA', 'regB', 'regC']
+    et_service_demand_yh = rng.rand(3, 8760)
+    trips = rng.randint(1, 20, size=(3, 24))
+    elec = rng.rand(3, 24)
+
+    kwargs = dict(
+        curr_yr=2030,
+        base_yr=2015,
+        yr_until_changed=2050,
+        et_service_demand_yh=et_service_demand_yh,
+        load_profiles=load_profiles,
+        regions=regions,
+        charging_scenario='sheduled',
+        reg_trips_ev_24h=trips,
+        reg_elec_24h=elec,
+        distributions={
+            'av_usable_battery_capacity': ('normal', 30, 5),
+            'yr_until_changed': ('integers', 2030, 2070)},
+        nr_of_samples=500,
+        quantiles=[0.1, 0.5, 0.9],
+        seed=1)
+
+    battery_capacity, et_demand_yh = run_uncertainty(**kwargs)
+
+    # Same samples in blocks of one region and one day
+    battery_capacity_chunks, et_demand_yh_chunks = run_uncertainty(chunk_size=1, **kwargs)
+    np.testing.assert_allclose(battery_capacity, battery_capacity_chunks)
+    np.testing.assert_allclose(et_demand_yh.to_array(), et_demand_yh_chunks.to_array())
+
+    # Reference with samples of the same generator
+    rng = np.random.default_rng(1)
+    av_usable_battery_capacity = rng.normal(30, 5, size=500)
+    yr_until_changed = rng.integers(2030, 2070, size=500)
+
+    expected_capacity = np.array([
+        main(regions, 2030, trips, elec, assumption_av_usable_battery_capacity=capacity)
+        for capacity in av_usable_battery_capacity])
+    np.testing.assert_allclose(
+        battery_capacity.to_numpy(), np.quantile(expected_capacity, [0.1, 0.5, 0.9], axis=0).T)
+    assert list(battery_capacity.index) == regions
+
+    expected_demand = np.array([
+        main_functions.load_curve_assignement(
+            curr_yr=2030,
+            base_yr=2015,
+            yr_until_changed=until,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled')
+        for until in yr_until_changed])
+
+    assert et_demand_yh.shape == (3, 3, 8760)
+    np.testing.assert_allclose(
+        et_demand_yh.to_array(), np.quantile(expected_demand, [0.1, 0.5, 0.9], axis=0))
+
+def test_run_uncertainty_memory(load_profiles):
+    """
+    """
+    nr_of_samples = 2000
+
+    tracemalloc.start()
+    try:
+        run_uncertainty(
+            2030, 2015, 2050, np.ones((3, 8760)), load_profiles, ['regA', 'regB', 'regC'], 'sheduled',
+            np.ones((3, 24)), np.ones((3, 24)), {'yr_until_changed': ('integers', 2030, 2070)},
+            nr_of_samples=nr_of_samples,
+            chunk_size=nr_of_samples * 24 * 5)
+        _, peak_memory = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Far below the profiles of all samples (samples, 8760)
+    assert peak_memory < nr_of_samples * 8760 * 8 / 10
+
+def test_run_uncertainty_invalid_assumption(load_profiles):
+    """
+    """
+    with pytest.raises(SystemExit):
+        run_uncertainty(
+            2030, 2015, 2050, np.ones((1, 8760)), load_profiles, ['regA'], 'sheduled',
+            np.ones((1, 24)), np.ones((1, 24)), {'battery': ('normal', 30, 5)})
@@ -0,0 +1,86 @@
+import numpy as np
+from et_module import main_functions
+from et_module.main import main, v2g_g2v_capacity
+from et_module.wrapper import ETWrapper, LocalDataHandle
+
+def test_et_wrapper(path_load_profiles):
+    """
+    """
+    regions = ['regA', 'regB', 'regC']
+    rng = np.random.RandomState(0)
+    et_service_demand_yh = rng.rand(3, 8760)
+    reg_trips_ev_24h = {
+        2015: rng.randint(0, 20, size=(3, 24)),
+        2030: rng.randint(0, 20, size=(3, 24))}
+    reg_elec_24h = rng.rand(3, 24)
+
+    data_handle = LocalDataHandle(
+        regions=regions,
+        parameters={
+            'path_load_profiles': str(path_load_profiles),
+            'yr_until_changed': 2050,
+            'charging_scenario': 'sheduled',
+            'diffusion': 'linear'},
+        data={
+            'et_service_demand_yh': et_service_demand_yh,
+            'reg_trips_ev_24h': reg_trips_ev_24h,
+            'reg_elec_24h': reg_elec_24h},
+        timesteps=[2015, 2030])
+
+    model = ETWrapper()
+    data_handle.run(model)
+
+    load_profiles = main_functions.get_load_profiles(str(path_load_profiles))
+
+    for timestep in [2015, 2030]:
+        expected = main_functions.load_curve_assignement(
+            curr_yr=timestep,
+            base_yr=2015,
+            yr_until_changed=2050,
+            et_service_demand_yh=et_service_demand_yh,
+            load_profiles=load_profiles,
+            regions=regions,
+            charging_scenario='sheduled')
+        np.testing.assert_allclose(data_handle.get_results('et_demand_yh', timestep), expected)
+
+        np.testing.assert_allclose(
+            data_handle.get_results('total_battery_capacity', timestep),
+            main(regions, timestep, reg_trips_ev_24h[timestep], reg_elec_24h))
+
+        v2g_capacity, g2v_capacity = v2g_g2v_capacity(reg_trips_ev_24h[timestep], reg_elec_24h)
+        np.testing.assert_allclose(data_handle.get_results('v2g_capacity', timestep), v2g_capacity)
+        np.testing.assert_allclose(data_handle.get_results('g2v_capacity', timestep), g2v_capacity)
+
+    # Outputs are written into the same arrays in every timestep
+    et_demand_yh = model.outputs_buffer['et_demand_yh']
+    data_handle.current_timestep = 2015
+    model.simulate(data_handle)
+    assert model.outputs_buffer['et_demand_yh'] is et_demand_yh
+    assert len(model.profile_cache) == 2
+
+def test_et_wrapper_region_order(path_load_profiles):
+    """Inputs given by region name are ordered as the regions of the model run
+    """
+    regions = ['regA', 'regB']
+    et_service_demand_yh = np.array([np.full((8760), 1.0), np.full((8760), 2.0)])
+    reg_24h = np.array([np.arange(24), np.arange(24)[::-1]])
+
+    data_handle = LocalDataHandle(
+        regions=regions,
+        parameters={
+            'path_load_profiles': str(path_load_profiles),
+            'yr_until_changed': 2050,
+            'charging_scenario': 'unsheduled',
+            'diffusion': 'linear'},
+        data={
+            'et_service_demand_yh': {'regB': et_service_demand_yh[1], 'regA': et_service_demand_yh[0]},
+            'reg_trips_ev_24h': {'regB': reg_24h[1], 'regA': reg_24h[0]},
+            'reg_elec_24h': reg_24h},
+        timesteps=[2015])
+
+    data_handle.run(ETWrapper())
+
+    np.testing.assert_allclose(
+        data_handle.get_results('et_demand_yh').sum(axis=1), [8760, 2 * 8760])
+    np.testing.assert_allclose(
+        data_handle.get_results('total_battery_capacity'), [23 * 30.0, 23 * 30.0])